@@ -1,34 +1,90 @@
 import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from dotenv import load_dotenv, find_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
 import streamlit as st
+from llm_gateway import LLMGateway, HttpLLM
+from extractive import extractive_answer
 
-api_key = None
+ANSWER_MODES = ("llm", "extractive", "auto")
 
-# 1) Try Streamlit secrets
-try:
-    api_key = st.secrets["GOOGLE_API_KEY"]
-except KeyError:
-    pass
+# In "auto" mode, answer extractively when the best sentence scores at least this
+# (cosine similarity, so the right value depends on the encoder)
+EXTRACTIVE_MIN_SCORE = float(os.getenv("EXTRACTIVE_MIN_SCORE", "0.85"))
 
-# 2) Fallback to .env
-if not api_key:
-    load_dotenv(find_dotenv())
-    api_key = os.getenv("GOOGLE_API_KEY")
+# Starting values of the app's retrieval cut-offs (0 turns a cut-off off). Like the
+# threshold above they are encoder specific: e5 scores unrelated text around 0.7,
+# MiniLM closer to 0.1. Calibrate them with evaluate.py --min-score/--max-score-drop.
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0"))
+RETRIEVAL_MAX_SCORE_DROP = float(os.getenv("RETRIEVAL_MAX_SCORE_DROP", "0"))
 
-# 3) Final validation
-if not api_key:
-    raise ValueError(
-        "GOOGLE_API_KEY not found. "
-        "Set it in Streamlit Secrets or in your .env file."
+# LangChain and the Gemini client are imported and constructed on first use
+# (see get_llm / get_prompt), so importing this module stays cheap.
+
+
+def get_api_key():
+    api_key = None
+
+    # 1) Try Streamlit secrets
+    try:
+        api_key = st.secrets["GOOGLE_API_KEY"]
+    except KeyError:
+        pass
+
+    # 2) Fallback to .env
+    if not api_key:
+        load_dotenv(find_dotenv())
+        api_key = os.getenv("GOOGLE_API_KEY")
+
+    # 3) Final validation
+    if not api_key:
+        raise ValueError(
+            "GOOGLE_API_KEY not found. "
+            "Set it in Streamlit Secrets or in your .env file."
+        )
+    return api_key
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """Build the Gemini client once, on first use."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model="gemini-3-flash-preview",
+        temperature=0,
+        google_api_key=get_api_key()
+    )
+
+@lru_cache(maxsize=1)
+def get_gateway():
+    """
+    Shared LLM gateway for all sessions in the process.
+
+    Set LLM_BACKEND_URL to send prompts to a JSON-over-HTTP backend (e.g. the
+    stub server in benchmarks/) instead of Gemini.
+    """
+    backend_url = os.getenv("LLM_BACKEND_URL")
+    return LLMGateway(
+        llm_factory=(lambda: HttpLLM(backend_url)) if backend_url else get_llm,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "60"))
     )
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-3-flash-preview",
-    temperature=0,
-    google_api_key=api_key
-)
+
+def warm_up():
+    """Build the Gemini client in a background thread. Errors surface on first use instead."""
+    def _build():
+        try:
+            get_gateway().llm
+        except Exception as e:
+            print(f"LLM warm-up skipped: {e}")
+
+    thread = threading.Thread(target=_build, daemon=True)
+    thread.start()
+    return thread
 
 # 2. Simple Memory Implementation
 class SimpleMemory:
@@ -61,9 +117,7 @@ class SimpleMemory:
 
 memory = SimpleMemory()
 
-prompt = PromptTemplate(
-    input_variables=["chat_history", "context", "question", "metadata"],
-    template="""
+PROMPT_TEMPLATE = """
             You are a helpful website assistant. Your primary role is to answer questions about the website content provided below.
 
             However, you should also be able to:
@@ -87,10 +141,61 @@ prompt = PromptTemplate(
 
             Answer:
 """
-)
 
-def answer_question(question, retriever, url, title):
-    docs = retriever.query(question)
+
+@lru_cache(maxsize=1)
+def get_prompt():
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        input_variables=["chat_history", "context", "question", "metadata"],
+        template=PROMPT_TEMPLATE
+    )
+
+
+def format_sources(docs, url=None, title=None):
+    """Source line for the prompt, from the chunks' own URL/title when they have them."""
+    sources = OrderedDict()
+    for doc in docs:
+        if doc.get("source_url"):
+            sources[doc["source_url"]] = doc.get("title") or title
+    if not sources:
+        sources[url] = title
+    return "; ".join(f"URL: {u}, Title: {t}" for u, t in sources.items())
+
+
+def answer_question(
+    question,
+    retriever,
+    url=None,
+    title=None,
+    top_k=3,
+    filters=None,
+    mode="llm",
+    min_score=None,
+    max_score_drop=None
+):
+    """
+    Answer a question from the retrieved chunks.
+
+    mode="llm" always calls Gemini, "extractive" returns the best matching sentences
+    without an LLM call, and "auto" tries the extractive answer first and only calls
+    Gemini when its best sentence scores below EXTRACTIVE_MIN_SCORE.
+    min_score and max_score_drop drop weak chunks before either sees them.
+    """
+    if mode not in ANSWER_MODES:
+        raise ValueError(f"Unknown answer mode '{mode}'. Choose one of {ANSWER_MODES}.")
+    filters = {**(filters or {}), "min_score": min_score, "max_score_drop": max_score_drop}
+
+    if mode != "llm":
+        result = extractive_answer(question, retriever, top_k=top_k, filters=filters)
+        if mode == "extractive" or result["score"] >= EXTRACTIVE_MIN_SCORE:
+            answer = result["answer"] or "The answer is not available on the provided website."
+            memory.save_context({"input": question}, {"output": answer})
+            return answer
+        docs = result["docs"]
+    else:
+        docs = retriever.query(question, top_k=top_k, **filters)
     if not docs:
         return "The answer is not available on the provided website."
 
@@ -100,29 +205,14 @@ def answer_question(question, retriever, url, title):
     history = memory.load_memory_variables({})["chat_history"]
     print(history)
 
-    response = llm.invoke(
-        prompt.format(
+    answer = get_gateway().generate_sync(
+        get_prompt().format(
             context=context,
             question=question,
-            metadata=f"URL: {url}, Title: {title}",
+            metadata=format_sources(docs, url, title),
             chat_history=history
         )
     )
-    
-    # Extract text content from response
-    # Handle both string and structured response formats
-    if isinstance(response.content, str):
-        answer = response.content
-    elif isinstance(response.content, list):
-        # Extract text from structured response
-        answer = ""
-        for item in response.content:
-            if isinstance(item, dict) and 'text' in item:
-                answer += item['text']
-            elif hasattr(item, 'text'):
-                answer += item.text
-    else:
-        answer = str(response.content)
 
     memory.save_context({"input": question}, {"output": answer})
     return answer
\ No newline at end of file
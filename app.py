@@ -1,25 +1,15 @@
+import os
 import time
+import numpy as np
 import streamlit as st
 from dotenv import load_dotenv
 
 from webscrap import extract_meaningful_text
+from embedding import get_encoder_spec
+from extractive import CachedEmbedder, extract_spans, format_answer
 
-from llama_index.core import VectorStoreIndex, Settings
-from llama_index.core.schema import TextNode
-from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-
-# --------------------------------------------------
-# SAFETY: Disable LLM completely (NO OpenAI ever)
-# --------------------------------------------------
-Settings.llm = None
-
-# --------------------------------------------------
-# Local Embeddings (NO API KEY)
-# --------------------------------------------------
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+# llama_index and the embedding model are loaded on first indexing (see
+# get_embed_model), so the page renders before any heavy import happens.
 
 load_dotenv()
 
@@ -56,6 +46,63 @@ def stream_data(text: str):
         yield word + " "
         time.sleep(0.03)
 
+@st.cache_resource(show_spinner=False)
+def get_embed_model():
+    from llama_index.core import Settings
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    # SAFETY: Disable LLM completely (NO OpenAI ever)
+    Settings.llm = None
+
+    # Local Embeddings (NO API KEY)
+    encoder_spec = get_encoder_spec(os.getenv("EMBEDDING_MODEL", "minilm"))
+    return HuggingFaceEmbedding(
+        model_name=encoder_spec["model_name"],
+        query_instruction=encoder_spec["query_prefix"],
+        text_instruction=encoder_spec["passage_prefix"]
+    )
+
+def build_retriever(chunks, url, title):
+    from llama_index.core import VectorStoreIndex, Settings
+    from llama_index.core.schema import TextNode
+    from llama_index.core.retrievers import VectorIndexRetriever
+
+    Settings.embed_model = get_embed_model()
+    Settings.llm = None
+
+    nodes = [
+        TextNode(
+            text=chunk,
+            metadata={
+                "source_url": url,
+                "title": title
+            }
+        )
+        for chunk in chunks
+    ]
+
+    index = VectorStoreIndex(nodes, show_progress=True)
+
+    return VectorIndexRetriever(
+        index=index,
+        similarity_top_k=5
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_sentence_embedder():
+    embed_model = get_embed_model()
+    return CachedEmbedder(lambda texts: np.array(embed_model.get_text_embedding_batch(texts), dtype="float32"))
+
+def extractive_answer(question, results, max_spans=3):
+    """Best matching sentences of the retrieved nodes, scored against the question embedding."""
+    chunks = [
+        {"chunk_text": r.node.text, "chunk_id": r.node.node_id, **r.node.metadata}
+        for r in results
+    ]
+    question_embedding = np.array(get_embed_model().get_query_embedding(question), dtype="float32")
+    spans = extract_spans(question_embedding, chunks, get_sentence_embedder(), max_spans)
+    return format_answer(spans)
+
 def chunk_text(text, chunk_size=900, overlap=120):
     chunks = []
     start = 0
@@ -100,25 +147,7 @@ if url_input and not st.session_state.website_loaded:
 
         chunks = chunk_text(text)
 
-        nodes = [
-            TextNode(
-                text=chunk,
-                metadata={
-                    "source_url": url_input,
-                    "title": title
-                }
-            )
-            for chunk in chunks
-        ]
-
-        index = VectorStoreIndex(nodes, show_progress=True)
-
-        retriever = VectorIndexRetriever(
-            index=index,
-            similarity_top_k=5
-        )
-
-        st.session_state.retriever = retriever
+        st.session_state.retriever = build_retriever(chunks, url_input, title)
         st.session_state.website_loaded = True
 
     st.success(f"✅ Website loaded successfully: **{title}**")
@@ -142,8 +171,8 @@ if prompt := st.chat_input(
             if not results:
                 answer = "The answer is not available on the provided website."
             else:
-                # Extract top matching chunks
-                answer = "\n\n".join(
+                # Best matching sentences from the top chunks
+                answer = extractive_answer(prompt, results) or "\n\n".join(
                     r.node.text for r in results[:3]
                 )
 
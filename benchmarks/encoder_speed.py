@@ -0,0 +1,88 @@
+"""
+Speed / recall trade-off benchmark for the embedding encoders.
+
+Every encoder (optionally with a reduced output dimension) indexes the same
+chunks. Recall@k is measured against the neighbours found by the reference
+encoder, so it shows how much retrieval changes when swapping to a faster model.
+
+Usage:
+    python benchmarks/encoder_speed.py --url https://example.com
+    python benchmarks/encoder_speed.py --text-file corpus.txt --encoder e5-small --encoder minilm --output-dim 256 --reduction pca
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding import ENCODERS, REDUCTIONS, VectorStoreManager, get_encoder_spec, load_model
+from text_processing import TextChunker
+
+from quantization_recall import load_corpus
+
+
+def run_encoder(name, chunks, questions, top_k, output_dim=None, reduction="truncate"):
+    # Load (or download) the model outside the timed build
+    start = time.perf_counter()
+    load_model(get_encoder_spec(name)["model_name"])
+    load_time = time.perf_counter() - start
+
+    store = VectorStoreManager(model_name=name, output_dim=output_dim, reduction=reduction)
+    start = time.perf_counter()
+    store.build_index(chunks)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_embeddings = store._embed_queries(questions)
+    _, indices = store._search(query_embeddings, top_k)
+    query_time = (time.perf_counter() - start) * 1000 / len(questions)
+
+    return indices, load_time, build_time, query_time, store.index.d
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", default=[])
+    parser.add_argument("--text-file", action="append", default=[])
+    parser.add_argument("--reference", default="e5-large")
+    parser.add_argument("--encoder", action="append", default=[], help=f"Preset or model name (presets: {', '.join(ENCODERS)})")
+    parser.add_argument("--output-dim", type=int, default=None)
+    parser.add_argument("--reduction", choices=REDUCTIONS, default="truncate")
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--chunk-overlap", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--query-words", type=int, default=12)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.url, args.text_file)
+    if not texts:
+        parser.error("Provide at least one --url or --text-file")
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, unit="words")
+    chunks = [c for text in texts for c in chunker.process(text)]
+    questions = [" ".join(c["chunk_text"].split()[:args.query_words]) for c in chunks]
+    top_k = min(args.top_k, len(chunks))
+    print(f"{len(chunks)} chunks, {len(questions)} queries, top_k={top_k}\n")
+
+    reference, ref_load, ref_build, ref_query, ref_dim = run_encoder(args.reference, chunks, questions, top_k)
+    rows = [(args.reference, ref_dim, 1.0, ref_load, ref_build, ref_query)]
+
+    encoders = args.encoder or [name for name in ENCODERS if name != args.reference]
+    for name in encoders:
+        indices, load_time, build_time, query_time, dim = run_encoder(
+            name, chunks, questions, top_k, args.output_dim, args.reduction
+        )
+        hits = sum(len(set(ref) & set(got)) for ref, got in zip(reference, indices))
+        rows.append((name, dim, hits / reference.size, load_time, build_time, query_time))
+
+    print(f"{'encoder':<40} {'dim':>5} {'recall@k':>9} {'load s':>7} {'build s':>8} {'speedup':>8} {'query ms':>9}")
+    for name, dim, recall, load_time, build_time, query_time in rows:
+        print(
+            f"{name:<40} {dim:>5} {recall:>9.3f} {load_time:>7.2f} {build_time:>8.2f} "
+            f"{ref_build / build_time:>7.1f}x {query_time:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Import-time profile of the app modules and entry points, measured in fresh interpreters.
+
+For each module this reports the wall time of `import <module>` and the
+heaviest imports it pulls in (from `python -X importtime`). The entry points
+(main.py, app.py) are profiled twice: their top-level imports alone, and a
+first Streamlit run through `streamlit.testing` (imports plus whatever the
+script builds at module level), with streamlit itself already imported.
+Heavy libraries are expected to show up only in the "deferred" rows, which
+import what the apps load on first use.
+
+--baseline profiles the same targets in a git worktree of another revision
+(e.g. the commit before imports were deferred) and prints both numbers. Times
+are the best of --repeat runs, after one untimed run that warms the bytecode
+and model caches.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module embedding --top 15
+    python benchmarks/import_time.py --baseline 3f779f5^ --output benchmarks/import_time_report.md
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_MODULES = ["webscrap", "text_processing", "dedup", "embedding", "ai_handler", "knowledge_base"]
+ENTRY_POINTS = ["main.py", "app.py"]
+DEFERRED_MODULES = ["sentence_transformers", "langchain_google_genai", "llama_index.core"]
+
+# The entry points read these at start-up: a small encoder keeps model downloads out of
+# the timings, and a dummy key lets revisions that build the Gemini client at import run
+# (those read st.secrets first, so the baseline worktree also gets a secrets.toml)
+ENV = {"EMBEDDING_MODEL": "minilm", "GOOGLE_API_KEY": "import-time-benchmark"}
+
+MARKER = "import time: -- start --"
+
+TIMED = """
+import sys, time
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+FIRST_RUN = """
+import time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=600)
+start = time.perf_counter()
+app.run()
+print(time.perf_counter() - start)
+for e in app.exception:
+    print("raised:", e.value)
+"""
+
+
+def _run(code, cwd, importtime=False):
+    """Run code in a fresh interpreter; returns (seconds, stdout lines after the time, stderr) or raises."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, env={**os.environ, **ENV})
+    if proc.returncode != 0:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["exit code %d" % proc.returncode])[-1])
+    out = proc.stdout.strip().splitlines()
+    # Scripts may print on their own; the timing is the first line that parses as a float
+    for i, line in enumerate(out):
+        try:
+            return float(line), out[i + 1:], proc.stderr
+        except ValueError:
+            continue
+    raise RuntimeError("no timing in output")
+
+
+def _rows(stderr):
+    """(cumulative_us, depth, name) for each import after the start marker."""
+    rows = []
+    started = False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            started = True
+            continue
+        if not started or not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting depth is encoded as two spaces of indentation per level after the first space
+        name = name[1:].rstrip()
+        rows.append((int(cumulative_us), (len(name) - len(name.lstrip())) // 2, name.strip()))
+    return rows
+
+
+def script_imports(path):
+    """The top-level import statements of a script, as code."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def profile(code, cwd, repeat=1, module=None):
+    """
+    Return (best_seconds, [(cumulative_us, name), ...]) for running import code.
+
+    The breakdown lists the imports the code triggers directly: for `import module`,
+    the modules it imports; otherwise each top-level import of the code.
+    """
+    _run(TIMED.format(marker=MARKER, code=code), cwd)
+    best, rows = None, []
+    for _ in range(repeat):
+        seconds, _, stderr = _run(TIMED.format(marker=MARKER, code=code), cwd, importtime=True)
+        if best is None or seconds < best:
+            best, rows = seconds, _rows(stderr)
+
+    if module is None:
+        return best, sorted(((us, name) for us, depth, name in rows if depth == 0), reverse=True)
+    # A module's row comes after its imports: walk back from it to the previous top-level row
+    end = max((i for i, (_, depth, name) in enumerate(rows) if depth == 0 and name == module), default=None)
+    if end is None:
+        return best, []
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    return best, sorted(((us, name) for us, depth, name in rows[start:end] if depth == 1), reverse=True)
+
+
+def first_run(script, cwd, repeat=1):
+    """Return (best_seconds,) for a first Streamlit run of script; a run that raises fails."""
+    best = None
+    for i in range(repeat + 1):
+        seconds, out, _ = _run(FIRST_RUN.format(script=script), cwd)
+        errors = [line[len("raised: "):] for line in out if line.startswith("raised: ")]
+        if errors:
+            raise RuntimeError(errors[0])
+        if i:
+            best = seconds if best is None else min(best, seconds)
+    return (best,)
+
+
+def measure(targets, cwd, repeat):
+    """{target: {"imports": (seconds, rows) or error, "first_run": (seconds,) or error}}"""
+    results = {}
+    for kind, target in targets:
+        result = results[target] = {}
+        if kind == "script":
+            path = os.path.join(cwd, target)
+            if not os.path.exists(path):
+                result["imports"] = result["first_run"] = "missing"
+                continue
+            code, module = script_imports(path), None
+        else:
+            code, module = f"import {target}", target
+        try:
+            result["imports"] = profile(code, cwd, repeat, module)
+        except RuntimeError as e:
+            result["imports"] = f"failed: {e}"
+        if kind == "script":
+            try:
+                result["first_run"] = first_run(target, cwd, repeat)
+            except RuntimeError as e:
+                result["first_run"] = f"failed: {e}"
+    return results
+
+
+def measure_baseline(revision, targets, repeat):
+    """measure() in a detached git worktree of revision."""
+    worktree = tempfile.mkdtemp(prefix="import-time-")
+    subprocess.run(["git", "worktree", "add", "--detach", worktree, revision], cwd=ROOT, check=True, capture_output=True)
+    os.makedirs(os.path.join(worktree, ".streamlit"))
+    with open(os.path.join(worktree, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write(f'GOOGLE_API_KEY = "{ENV["GOOGLE_API_KEY"]}"\n')
+    try:
+        return measure(targets, worktree, repeat)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True)
+
+
+def _seconds(value):
+    return value if isinstance(value, str) else f"{value[0]:.3f}s"
+
+
+def format_target(target, current, baseline, top):
+    lines = []
+    for key, label in (("imports", "imports"), ("first_run", "first run")):
+        if key not in current:
+            continue
+        line = f"{target:<24} {label:<10} {_seconds(current[key]):>10}"
+        if baseline is not None:
+            line += f"   (baseline {_seconds(baseline[key])})"
+        lines.append(line)
+
+    for label, result in (("", current), ("baseline: ", baseline)):
+        if result is None or isinstance(result["imports"], str):
+            continue
+        for cumulative_us, name in result["imports"][1][:top]:
+            lines.append(f"    {label + name:<48} {cumulative_us / 1e6:>7.3f}s")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", default=[])
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="Also profile this git revision, e.g. the commit before a change")
+    parser.add_argument("--output", help="Also write the report to this file (e.g. benchmarks/import_time_report.md)")
+    args = parser.parse_args()
+
+    if args.module:
+        groups = [("app modules", [("module", m) for m in args.module])]
+    else:
+        groups = [
+            ("app modules", [("module", m) for m in APP_MODULES]),
+            ("entry points", [("script", s) for s in ENTRY_POINTS]),
+            ("deferred modules", [("module", m) for m in DEFERRED_MODULES]),
+        ]
+
+    lines = []
+    for label, targets in groups:
+        current = measure(targets, ROOT, args.repeat)
+        # Deferred libraries are the same in both trees
+        baseline = (
+            measure_baseline(args.baseline, targets, args.repeat)
+            if args.baseline and label != "deferred modules" else None
+        )
+        lines.append(f"== {label} ==")
+        for _, target in targets:
+            lines.extend(format_target(target, current[target], baseline and baseline[target], args.top))
+        lines.append("")
+    print("\n".join(lines))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            command = "python benchmarks/import_time.py" + (f" --baseline {args.baseline}" if args.baseline else "")
+            f.write(f"# Import-time report\n\nGenerated with `{command}` (Python {sys.version.split()[0]}).\n\n")
+            f.write("```\n" + "\n".join(lines).rstrip() + "\n```\n")
+
+
+if __name__ == "__main__":
+    main()
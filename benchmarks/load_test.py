@@ -0,0 +1,194 @@
+"""
+Concurrent-user load test for the index + Q&A path.
+
+Simulates N Streamlit sessions (one thread each, like the Streamlit server) that
+index a page from a local HTML fixture server and then ask questions through
+ai_handler.answer_question, with the LLM replaced by the local stub server.
+Concurrency is ramped through --levels; each level reports p50/p95/p99 latency
+for indexing and for questions, question throughput, RSS growth, errors and the
+size of the shared chat history that level left behind. The history is cleared
+before every level so prompt sizes, and latencies, stay comparable across levels,
+and the app's own console output is silenced while a level runs.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --levels 1,4,16,32 --questions 10 --model e5-small --llm-latency 1.0
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import make_server as make_llm_server
+
+WORDS = (
+    "account billing invoice password reset shipping delivery refund warranty support "
+    "order tracking subscription plan upgrade download install configure network device "
+    "battery screen update privacy security contact hours office location return policy"
+).split()
+
+
+def make_page(i, paragraphs=30, rng=None):
+    rng = rng or random.Random(i)
+    body = "\n".join(
+        f"<p>Section {i}.{p}: " + " ".join(rng.choice(WORDS) for _ in range(60)) + ".</p>"
+        for p in range(paragraphs)
+    )
+    return f"<html><head><title>Fixture page {i}</title></head><body><h1>Fixture page {i}</h1>{body}</body></html>"
+
+
+def start_fixture_server(pages):
+    """Serve /page/<i> from memory on a free local port."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                html = pages[int(self.path.rstrip("/").rsplit("/", 1)[-1])]
+            except (ValueError, IndexError):
+                self.send_error(404)
+                return
+            data = html.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, else peak RSS from getrusage)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_session(session_id, args, base_url, stats, lock):
+    from webscrap import extract_meaningful_text
+    from text_processing import TextChunker
+    from embedding import VectorStoreManager
+    from ai_handler import answer_question
+
+    rng = random.Random(session_id)
+    url = f"{base_url}/page/{rng.randrange(args.pages)}"
+    try:
+        start = time.perf_counter()
+        result = extract_meaningful_text(url)
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+        chunks = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap).process(result["content"])
+        store = VectorStoreManager(model_name=args.model)
+        store.build_index(chunks)
+        with lock:
+            stats["index"].append(time.perf_counter() - start)
+    except Exception:
+        with lock:
+            stats["errors"].append(traceback.format_exc(limit=1))
+        return
+
+    for _ in range(args.questions):
+        question = f"What about {rng.choice(WORDS)} and {rng.choice(WORDS)}?"
+        try:
+            start = time.perf_counter()
+            answer_question(question, store, url, result["title"], top_k=args.top_k, mode=args.mode)
+            with lock:
+                stats["ask"].append(time.perf_counter() - start)
+        except Exception:
+            with lock:
+                stats["errors"].append(traceback.format_exc(limit=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per session")
+    parser.add_argument("--pages", type=int, default=50, help="Fixture pages to serve")
+    parser.add_argument("--model", default=None, help="Encoder preset or model name (default: EMBEDDING_MODEL)")
+    parser.add_argument("--mode", choices=("llm", "extractive", "auto"), default="llm")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM mean latency in seconds")
+    parser.add_argument("--llm-max-concurrent", type=int, default=8, help="Stub LLM in-flight limit before 429")
+    args = parser.parse_args()
+
+    pages = [make_page(i) for i in range(args.pages)]
+    fixture = start_fixture_server(pages)
+    llm = make_llm_server(latency=args.llm_latency, max_concurrent=args.llm_max_concurrent)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    # Must be set before ai_handler builds its gateway
+    os.environ["LLM_BACKEND_URL"] = f"http://127.0.0.1:{llm.server_port}"
+
+    from embedding import DEFAULT_ENCODER, load_model, get_encoder_spec
+    from ai_handler import get_gateway, memory
+    args.model = args.model or DEFAULT_ENCODER
+    # Load the shared encoder up front so the first level does not measure model loading
+    load_model(get_encoder_spec(args.model)["model_name"])
+
+    base_url = f"http://127.0.0.1:{fixture.server_port}"
+    baseline_rss = rss_mb()
+    print(f"Model {args.model}, mode {args.mode}, baseline RSS {baseline_rss:.0f} MB\n")
+    print(
+        f"{'sessions':>8} {'index p50':>10} {'p95':>7} {'p99':>7} {'ask p50':>8} {'p95':>7} {'p99':>7} "
+        f"{'q/s':>7} {'RSS MB':>8} {'+MB':>6} {'hist KB':>7} {'errors':>6} {'429s':>5}"
+    )
+
+    for level in [int(x) for x in args.levels.split(",")]:
+        stats = {"index": [], "ask": [], "errors": []}
+        lock = threading.Lock()
+        rejected_before = llm.rejected
+        # Every session shares ai_handler.memory: start each level with an empty history
+        memory.clear()
+        start = time.perf_counter()
+        # answer_question prints the whole history on every call, keep it out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                for session_id in range(level):
+                    pool.submit(run_session, session_id, args, base_url, stats, lock)
+        elapsed = time.perf_counter() - start
+        rss = rss_mb()
+        history_kb = len(memory.load_memory_variables()["chat_history"]) / 1024
+
+        print(
+            f"{level:>8} {percentile(stats['index'], 50):>10.2f} {percentile(stats['index'], 95):>7.2f} "
+            f"{percentile(stats['index'], 99):>7.2f} {percentile(stats['ask'], 50):>8.2f} "
+            f"{percentile(stats['ask'], 95):>7.2f} {percentile(stats['ask'], 99):>7.2f} "
+            f"{len(stats['ask']) / elapsed:>7.2f} {rss:>8.0f} {rss - baseline_rss:>6.0f} {history_kb:>7.1f} "
+            f"{len(stats['errors']):>6} {llm.rejected - rejected_before:>5}"
+        )
+        for error in sorted(set(stats["errors"]))[:3]:
+            print("    " + error.strip().splitlines()[-1])
+
+    print(f"\nGateway stats: {get_gateway().stats}")
+
+
+if __name__ == "__main__":
+    main()
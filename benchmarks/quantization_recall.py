@@ -0,0 +1,87 @@
+"""
+Recall / memory benchmark for the VectorStoreManager storage precisions.
+
+Every precision is compared against the exact float32 index: recall@k is the
+fraction of the float32 top-k chunks that the quantized index also returns.
+Queries are the opening words of each chunk, so no labelled data is needed.
+
+Usage:
+    python benchmarks/quantization_recall.py --url https://example.com --url https://example.org
+    python benchmarks/quantization_recall.py --text-file corpus.txt --top-k 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding import PRECISIONS, VectorStoreManager
+from text_processing import TextChunker
+from webscrap import extract_meaningful_text
+
+
+def load_corpus(urls, text_files):
+    texts = []
+    for url in urls:
+        result = extract_meaningful_text(url)
+        if result["status"] == "success":
+            texts.append(result["content"])
+        else:
+            print(f"Skipping {url}: {result['message']}")
+    for path in text_files:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", default=[])
+    parser.add_argument("--text-file", action="append", default=[])
+    parser.add_argument("--model", default="intfloat/e5-large-v2")
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--chunk-overlap", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--query-words", type=int, default=12)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.url, args.text_file)
+    if not texts:
+        parser.error("Provide at least one --url or --text-file")
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, unit="words")
+    chunks = [c for text in texts for c in chunker.process(text)]
+    questions = [" ".join(c["chunk_text"].split()[:args.query_words]) for c in chunks]
+    top_k = min(args.top_k, len(chunks))
+    print(f"{len(chunks)} chunks, {len(questions)} queries, top_k={top_k}\n")
+
+    store = VectorStoreManager(model_name=args.model)
+    reference = None
+    print(f"{'precision':<10} {'bytes/vec':>10} {'disk B/vec':>11} {'recall@k':>9} {'build s':>8} {'query ms':>9}")
+    for precision in PRECISIONS:
+        store.precision = precision
+        start = time.perf_counter()
+        store.build_index(chunks)
+        build_time = time.perf_counter() - start
+
+        query_embeddings = store._embed_queries(questions)
+        start = time.perf_counter()
+        _, indices = store._search(query_embeddings, top_k)
+        query_time = (time.perf_counter() - start) * 1000 / len(questions)
+
+        if reference is None:
+            reference = indices
+        hits = sum(len(set(ref) & set(got)) for ref, got in zip(reference, indices))
+        recall = hits / reference.size
+
+        bytes_per_vector = store.memory_bytes() / store.index.ntotal
+        disk_per_vector = store.disk_bytes() / store.index.ntotal
+        print(
+            f"{precision:<10} {bytes_per_vector:>10.0f} {disk_per_vector:>11.0f} {recall:>9.3f} "
+            f"{build_time:>8.2f} {query_time:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Local stub LLM server for exercising llm_gateway without calling Gemini.
+
+POST {"prompt": "..."} -> {"text": "..."} after a simulated latency. When more
+than --max-concurrent requests are in flight it answers HTTP 429, like a
+provider rate limit. Point the apps at it with LLM_BACKEND_URL.
+
+Usage:
+    python benchmarks/stub_llm_server.py --port 8765 --latency 0.8 --max-concurrent 4
+    LLM_BACKEND_URL=http://127.0.0.1:8765 streamlit run main.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    server_version = "StubLLM/1.0"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        prompt = json.loads(body or b"{}").get("prompt", "")
+
+        with server.lock:
+            server.requests += 1
+            if server.in_flight >= server.max_concurrent:
+                server.rejected += 1
+                self._reply(429, {"error": "rate limited"})
+                return
+            server.in_flight += 1
+        try:
+            time.sleep(max(0.0, random.gauss(server.latency, server.latency * 0.2)))
+            match = re.search(r"Question:\s*(.*)", prompt)
+            question = match.group(1).strip() if match else prompt.strip()[:80]
+            self._reply(200, {"text": f"Stub answer for: {question}"})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.5, max_concurrent=8):
+    """Create (but do not start) a stub server. port=0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), StubLLMHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.max_concurrent = max_concurrent
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.requests = 0
+    server.rejected = 0
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response time in seconds")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="In-flight requests before answering 429")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.max_concurrent)
+    print(f"Stub LLM listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"requests={server.requests} rejected={server.rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import re
+import json
+import hashlib
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+class ContentDeduplicator:
+    """
+    Drop near-duplicate pages and cross-page boilerplate before chunking.
+
+    - Pages are fingerprinted with a 64-bit SimHash over word shingles. A page within
+      `max_distance` bits of an already seen page (different URL) is a near duplicate.
+      Candidates are looked up by splitting the fingerprint into `max_distance + 1`
+      bands, so a near duplicate always shares at least one band; larger distances
+      mean narrower bands and more candidates to compare.
+    - Text blocks (the paragraphs produced by `extract_meaningful_text`) are hashed
+      after normalization. Blocks found on at least `min_block_pages` pages of the same
+      site are treated as boilerplate (nav text, cookie banners, footers) and removed.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 3,
+        min_block_pages: int = 3,
+        shingle_size: int = 3
+    ):
+        if not 0 <= max_distance < 64:
+            raise ValueError(f"max_distance must be between 0 and 63 bits, got {max_distance}")
+        self.max_distance = max_distance
+        # max_distance + 1 bands: fewer differing bits than bands leaves one band intact
+        bands = max_distance + 1
+        edges = [64 * b // bands for b in range(bands + 1)]
+        self._band_spans = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self.min_block_pages = min_block_pages
+        self.shingle_size = shingle_size
+
+        self._fingerprints: Dict[str, int] = {}
+        self._bands: Dict[tuple, set] = {}
+        self._page_blocks: Dict[str, set] = {}
+        self._block_counts: Dict[tuple, int] = {}
+
+    # -------------------------------
+    # 1. FINGERPRINTING
+    # -------------------------------
+    @staticmethod
+    def _hash64(text: str) -> int:
+        return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+    @staticmethod
+    def _normalize_block(block: str) -> str:
+        block = re.sub(r'\d+', '0', block.lower())
+        return re.sub(r'\W+', ' ', block).strip()
+
+    def simhash(self, text: str) -> int:
+        words = re.findall(r'\w+', text.lower())
+        if not words:
+            return 0
+        n = max(1, len(words) - self.shingle_size + 1)
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(n)}
+
+        hashes = np.array([self._hash64(s) for s in shingles], dtype=np.uint64)
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        # Majority vote per bit position
+        votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+        return int(np.packbits(votes, bitorder="little").view(np.uint64)[0])
+
+    def _band_keys(self, fingerprint: int):
+        return [(b, (fingerprint >> start) & mask) for b, (start, mask) in enumerate(self._band_spans)]
+
+    # -------------------------------
+    # 2. NEAR-DUPLICATE PAGES
+    # -------------------------------
+    def find_duplicate(self, url: str, text: str) -> Optional[str]:
+        """Return the URL of an already seen near-duplicate page, or None."""
+        fingerprint = self.simhash(text)
+        candidates = set()
+        for key in self._band_keys(fingerprint):
+            candidates |= self._bands.get(key, set())
+        candidates.discard(url)
+
+        for other in sorted(candidates):
+            if bin(fingerprint ^ self._fingerprints[other]).count("1") <= self.max_distance:
+                return other
+        return None
+
+    def add_page(self, url: str, text: str) -> Optional[str]:
+        """
+        Register a page. Returns the URL it duplicates (and does not register it),
+        or None if the page is new.
+        """
+        duplicate_of = self.find_duplicate(url, text)
+        if duplicate_of is not None:
+            return duplicate_of
+
+        block_hashes = {self._hash64(self._normalize_block(b)) for b in text.split("\n\n") if b.strip()}
+        self._register(url, self.simhash(text), block_hashes)
+        return None
+
+    def _register(self, url: str, fingerprint: int, block_hashes: Iterable[int]):
+        self.remove_page(url)
+        self._fingerprints[url] = fingerprint
+        for key in self._band_keys(fingerprint):
+            self._bands.setdefault(key, set()).add(url)
+
+        site = urlparse(url).netloc
+        blocks = {(site, h) for h in block_hashes}
+        self._page_blocks[url] = blocks
+        for block in blocks:
+            self._block_counts[block] = self._block_counts.get(block, 0) + 1
+
+    def remove_page(self, url: str):
+        fingerprint = self._fingerprints.pop(url, None)
+        if fingerprint is not None:
+            for key in self._band_keys(fingerprint):
+                self._bands[key].discard(url)
+        for block in self._page_blocks.pop(url, set()):
+            self._block_counts[block] -= 1
+
+    # -------------------------------
+    # 3. CROSS-PAGE BOILERPLATE
+    # -------------------------------
+    def filter_boilerplate(self, url: str, text: str) -> str:
+        """Remove blocks that recur on at least `min_block_pages` pages of the same site."""
+        site = urlparse(url).netloc
+        kept = [
+            b for b in text.split("\n\n")
+            if b.strip() and self._block_counts.get((site, self._hash64(self._normalize_block(b))), 0) < self.min_block_pages
+        ]
+        return "\n\n".join(kept)
+
+    # -------------------------------
+    # 4. MAIN PIPELINE
+    # -------------------------------
+    def dedupe(self, pages: Iterable[Dict]) -> List[Dict]:
+        """
+        Two-pass dedup over pages ({"url", "content", ...} dicts).
+
+        Near-duplicate pages are dropped, then boilerplate blocks are stripped from
+        the rest. Returned pages are copies with a filtered "content".
+        """
+        kept = [p for p in pages if self.add_page(p["url"], p["content"]) is None]
+
+        results = []
+        for page in kept:
+            content = self.filter_boilerplate(page["url"], page["content"])
+            if content:
+                results.append({**page, "content": content})
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            "pages": len(self._fingerprints),
+            "boilerplate_blocks": sum(1 for c in self._block_counts.values() if c >= self.min_block_pages),
+        }
+
+    def pages(self) -> List[str]:
+        return list(self._fingerprints)
+
+    # -------------------------------
+    # 5. PERSISTENCE
+    # -------------------------------
+    def save(self, path: str):
+        """Write fingerprints and block hashes of all registered pages to a JSON file."""
+        state = {
+            "config": {
+                "max_distance": self.max_distance,
+                "min_block_pages": self.min_block_pages,
+                "shingle_size": self.shingle_size,
+            },
+            "pages": {
+                url: {"fingerprint": fingerprint, "blocks": sorted(h for _, h in self._page_blocks.get(url, ()))}
+                for url, fingerprint in self._fingerprints.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path: str) -> "ContentDeduplicator":
+        """Restore a deduplicator saved with save(), so new pages are compared against all known pages."""
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        deduper = cls(**state["config"])
+        for url, page in state["pages"].items():
+            deduper._register(url, page["fingerprint"], page["blocks"])
+        return deduper
+
+
+if __name__ == "__main__":
+    footer = "Accept cookies to improve your browsing experience on this site."
+    pages = [
+        {"url": "https://example.com/a", "content": f"Page A explains chunking in depth.\n\n{footer}"},
+        {"url": "https://example.com/b", "content": f"Page B covers vector search basics.\n\n{footer}"},
+        {"url": "https://example.com/c", "content": f"Page C compares embedding models.\n\n{footer}"},
+        {"url": "https://example.com/c?ref=nav", "content": f"Page C compares embedding models.\n\n{footer}"},
+    ]
+
+    deduper = ContentDeduplicator()
+    for page in deduper.dedupe(pages):
+        print(page["url"])
+        print(page["content"])
+        print("-" * 80)
+    print(deduper.stats())
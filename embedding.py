@@ -1,29 +1,698 @@
-from sentence_transformers import SentenceTransformer
+import os
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
 import faiss
 import numpy as np
 
+# sentence_transformers (and torch) are imported on first model load, see load_model()
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+# Encoder presets. Each model family expects its own instruction prefixes,
+# passing a raw Hugging Face model name also works (see get_encoder_spec).
+ENCODERS = {
+    "e5-large": {
+        "model_name": "intfloat/e5-large-v2",
+        "query_prefix": "query: ",
+        "passage_prefix": "passage: ",
+    },
+    "e5-base": {
+        "model_name": "intfloat/e5-base-v2",
+        "query_prefix": "query: ",
+        "passage_prefix": "passage: ",
+    },
+    "e5-small": {
+        "model_name": "intfloat/e5-small-v2",
+        "query_prefix": "query: ",
+        "passage_prefix": "passage: ",
+    },
+    "bge-small": {
+        "model_name": "BAAI/bge-small-en-v1.5",
+        "query_prefix": "Represent this sentence for searching relevant passages: ",
+        "passage_prefix": "",
+    },
+    "minilm": {
+        "model_name": "sentence-transformers/all-MiniLM-L6-v2",
+        "query_prefix": "",
+        "passage_prefix": "",
+    },
+}
+
+DEFAULT_ENCODER = os.getenv("EMBEDDING_MODEL", "e5-large")
+
+# Dimension reduction applied after encoding:
+# - truncate: keep the leading dims (Matryoshka-style), then re-normalize
+# - pca:      PCA projection fitted on the passages of each index
+REDUCTIONS = ("truncate", "pca")
+
+# Storage precisions supported for the vector index:
+# - float32: exact inner product (IndexFlatIP), 4 bytes / dim
+# - float16: scalar quantized to half precision, 2 bytes / dim
+# - int8:    scalar quantized to 8 bits per dim, 1 byte / dim. The quantizer is trained on
+#            the chunk vectors and re-trained from float16 copies kept on disk when new
+#            vectors fall outside its range, or on compaction
+# - binary:  sign bits only (1 bit / dim) for a hamming first pass, candidates are
+#            re-scored against float16 copies of the vectors memory-mapped from disk
+PRECISIONS = ("float32", "float16", "int8", "binary")
+
+# How far (as a fraction of a dimension's trained range) new vectors may fall outside
+# the int8 range before the quantizer is re-trained instead of clipping them
+INT8_RETRAIN_TOLERANCE = 0.05
+
+
+def get_encoder_spec(name):
+    """Resolve a preset key or Hugging Face model name to a model name + prefixes."""
+    if name in ENCODERS:
+        return dict(ENCODERS[name])
+    for spec in ENCODERS.values():
+        if spec["model_name"] == name:
+            return dict(spec)
+    # Unknown model: e5-family models still need their prefixes
+    prefixed = "e5" in name.lower()
+    return {
+        "model_name": name,
+        "query_prefix": "query: " if prefixed else "",
+        "passage_prefix": "passage: " if prefixed else "",
+    }
+
+
+def load_model(model_name):
+    """Load a SentenceTransformer once per process and share it between stores."""
+    with _MODELS_LOCK:
+        if model_name not in _MODELS:
+            from sentence_transformers import SentenceTransformer
+            _MODELS[model_name] = SentenceTransformer(model_name)
+        return _MODELS[model_name]
+
+
+def write_atomically(path, write):
+    """
+    Call write(tmp_path) and move the result over path, so an interrupted or concurrent
+    save never leaves a half-written file behind.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_json(data):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    return write
+
+
+def warm_up(model_name=DEFAULT_ENCODER):
+    """Start loading an encoder in a background thread. Returns the thread."""
+    thread = threading.Thread(
+        target=load_model, args=(get_encoder_spec(model_name)["model_name"],), daemon=True
+    )
+    thread.start()
+    return thread
+
+
+class _DiskVectors:
+    """
+    Append-only float16 copies of index vectors in a temporary file, keyed by chunk id.
+
+    Reads go through a memory map, so the vectors cost page cache (reclaimable)
+    rather than resident memory.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        # chunk id -> row in the file
+        self.rows = {}
+        self._file = tempfile.TemporaryFile(prefix="vectors-", suffix=".f16")
+        self._count = 0
+        self._map = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, vectors, ids):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(np.ascontiguousarray(vectors, dtype="float16").tobytes())
+        self._file.flush()
+        start = self._count
+        self._count += len(ids)
+        self.rows.update((int(chunk_id), start + n) for n, chunk_id in enumerate(ids))
+
+    def get(self, ids):
+        """float32 vectors for the given chunk ids, shape (len(ids), dim)."""
+        if not len(ids):
+            return np.empty((0, self.dim), dtype="float32")
+        rows = np.fromiter((self.rows[int(i)] for i in ids), dtype="int64", count=len(ids))
+        vectors = self._map
+        if vectors is None or len(vectors) < self._count:
+            vectors = self._map = np.memmap(self._file, dtype="float16", mode="r", shape=(self._count, self.dim))
+        return vectors[rows].astype("float32")
+
+    def ids(self):
+        return np.fromiter(self.rows, dtype="int64", count=len(self.rows))
+
+    def remove(self, ids):
+        """Drop ids and rewrite the file with the remaining rows."""
+        for chunk_id in ids:
+            self.rows.pop(int(chunk_id), None)
+        fresh = _DiskVectors(self.dim)
+        live = self.ids()
+        for start in range(0, len(live), 4096):
+            fresh.add(self.get(live[start:start + 4096]), live[start:start + 4096])
+        self._file.close()
+        self.rows, self._file, self._count, self._map = fresh.rows, fresh._file, fresh._count, None
+
+    def save(self, path):
+        """Write the live rows to path in id order. Returns that id order."""
+        live = self.ids()
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(live), 4096):
+                    f.write(self.get(live[start:start + 4096]).astype("float16").tobytes())
+
+        write_atomically(path, write)
+        return live.tolist()
+
+    @classmethod
+    def load(cls, path, dim, ids):
+        vectors = cls(dim)
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, vectors._file)
+        vectors._file.flush()
+        vectors._count = len(ids)
+        vectors.rows = {int(chunk_id): n for n, chunk_id in enumerate(ids)}
+        return vectors
+
+
 class VectorStoreManager:
-    def __init__(self, model_name="intfloat/e5-large-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name=DEFAULT_ENCODER,
+        precision="float32",
+        rescore_factor=4,
+        output_dim=None,
+        reduction="truncate",
+        query_prefix=None,
+        passage_prefix=None,
+        query_cache_size=512,
+        query_cache=None,
+        min_score=None,
+        max_score_drop=None,
+        cache_passages=False,
+        compaction_ratio=0.25
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'. Choose one of {PRECISIONS}.")
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction '{reduction}'. Choose one of {REDUCTIONS}.")
+
+        spec = get_encoder_spec(model_name)
+        self.model_name = spec["model_name"]
+        self.query_prefix = spec["query_prefix"] if query_prefix is None else query_prefix
+        self.passage_prefix = spec["passage_prefix"] if passage_prefix is None else passage_prefix
+        self._model = None
+
+        self.precision = precision
+        self.rescore_factor = rescore_factor
+        self.output_dim = output_dim
+        self.reduction = reduction
         self.index = None
-        self.chunk_metadata = []
-        
-    def build_index(self, chunks):
-        self.chunk_metadata = chunks
-        texts_to_embed = [f"passage: {c['chunk_text']}" for c in chunks]
-        embeddings = self.model.encode(texts_to_embed, normalize_embeddings=True)
+        # Chunks keyed by their stable chunk id, and chunk ids per document URL
+        self.chunk_metadata = {}
+        self._doc_chunks = {}
+        self._next_id = 0
+        # Deleted chunk ids still physically present in the index until compact()
+        self._tombstones = set()
+        self.compaction_ratio = compaction_ratio
+        # Retrieval cut-offs: absolute minimum score, and maximum drop below the best hit
+        self.min_score = min_score
+        self.max_score_drop = max_score_drop
+        # LRU cache of raw (un-reduced) query embeddings keyed by prefixed text
+        self.query_cache_size = query_cache_size
+        # Pass a shared OrderedDict to reuse query embeddings across stores with the same encoder
+        self._query_cache = OrderedDict() if query_cache is None else query_cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Raw passage embeddings keyed by chunk text, so re-chunking only encodes changed chunks
+        self.cache_passages = cache_passages
+        self._passage_cache = {}
+        # PCA matrix fitted per index when reduction == "pca"
+        self._projection = None
+        # Bytes per stored vector, and the on-disk float16 vectors that binary precision
+        # re-scores with and int8 re-trains from
+        self._code_size = 0
+        self._vectors = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_model(self.model_name)
+        return self._model
+
+    def _encode(self, texts):
+        embeddings = self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        # Avoid a second full copy when the model already returns float32
+        return np.ascontiguousarray(embeddings, dtype="float32")
+
+    def _fit_projection(self, embeddings):
+        self._projection = None
+        if not self.output_dim or self.output_dim >= embeddings.shape[1] or self.reduction != "pca":
+            return
+        if len(embeddings) < self.output_dim:
+            print(f"Only {len(embeddings)} chunks, too few to fit PCA to {self.output_dim} dims. Truncating instead.")
+            return
+        self._projection = faiss.PCAMatrix(embeddings.shape[1], self.output_dim)
+        self._projection.train(embeddings)
+
+    def _reduce(self, embeddings):
+        if not self.output_dim or self.output_dim >= embeddings.shape[1]:
+            return embeddings
+        if self._projection is not None:
+            reduced = self._projection.apply(embeddings)
+        else:
+            reduced = np.ascontiguousarray(embeddings[:, :self.output_dim])
+        faiss.normalize_L2(reduced)
+        return reduced
+
+    def _embed_passages(self, texts, fit=False):
+        if self.cache_passages:
+            missing = [t for t in OrderedDict.fromkeys(texts) if t not in self._passage_cache]
+            if missing:
+                encoded = self._encode([f"{self.passage_prefix}{t}" for t in missing])
+                self._passage_cache.update(zip(missing, encoded))
+            print(f"Encoded {len(missing)} new chunks, reused {len(texts) - len(missing)} cached.")
+            embeddings = np.stack([self._passage_cache[t] for t in texts])
+        else:
+            embeddings = self._encode([f"{self.passage_prefix}{t}" for t in texts])
+        if fit:
+            self._fit_projection(embeddings)
+        return self._reduce(embeddings)
+
+    def _embed_queries(self, texts):
+        keys = [f"{self.query_prefix}{t}" for t in texts]
+        if not self.query_cache_size:
+            return self._reduce(self._encode(keys))
+
+        missing = list(OrderedDict.fromkeys(k for k in keys if k not in self._query_cache))
+        self.cache_misses += len(missing)
+        self.cache_hits += len(keys) - len(missing)
+        if missing:
+            for key, embedding in zip(missing, self._encode(missing)):
+                self._query_cache[key] = embedding
+
+        embeddings = []
+        for key in keys:
+            self._query_cache.move_to_end(key)
+            embeddings.append(self._query_cache[key])
+        while len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+        return self._reduce(np.stack(embeddings))
+
+    def embed_queries(self, texts):
+        """Query embeddings in the index space (prefixed, cached and reduced like query())."""
+        return self._embed_queries(texts)
+
+    def embed_passages(self, texts):
+        """Passage embeddings in the index space, without touching the index or the passage cache."""
+        return self._reduce(self._encode([f"{self.passage_prefix}{t}" for t in texts]))
+
+    def cache_stats(self):
+        """Hit / miss counters for the query embedding cache."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "size": len(self._query_cache),
+            "max_size": self.query_cache_size,
+        }
+
+    def clear_query_cache(self):
+        self._query_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _create_index(self, embeddings):
         dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(np.array(embeddings, dtype='float32'))
-        print(f"Index built with {self.index.ntotal} vectors.")
-    
-    def query(self, question, top_k=3):
+
+        if self.precision == "float32":
+            base = faiss.IndexFlatIP(dim)
+        elif self.precision == "float16":
+            base = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        elif self.precision == "int8":
+            base = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            # The min/max range is all the 8-bit quantizer learns from its training set
+            base.train(np.stack([embeddings.min(axis=0), embeddings.max(axis=0)]))
+            if self._vectors is None:
+                self._vectors = _DiskVectors(dim)
+        else:  # binary
+            if dim % 8 != 0:
+                raise ValueError(f"Binary precision needs a dimension divisible by 8, got {dim}.")
+            base = faiss.IndexBinaryFlat(dim)
+            if self._vectors is None:
+                self._vectors = _DiskVectors(dim)
+            self._code_size = base.code_size
+            self.index = faiss.IndexBinaryIDMap2(base)
+            return
+
+        # ID-mapped so chunk ids stay stable across deletes and compaction
+        self._code_size = base.code_size
+        self.index = faiss.IndexIDMap2(base)
+
+    def _add_vectors(self, embeddings, ids):
+        if self.precision == "binary":
+            self.index.add_with_ids(np.packbits(embeddings > 0, axis=1), ids)
+            self._vectors.add(embeddings, ids)
+        else:
+            self.index.add_with_ids(embeddings, ids)
+            if self._vectors is not None:
+                self._vectors.add(embeddings, ids)
+
+    def _int8_clips(self, embeddings):
+        """True when embeddings fall outside the trained int8 range by more than the tolerance."""
+        if self.precision != "int8" or self._vectors is None:
+            return False
+        dim = embeddings.shape[1]
+        trained = faiss.vector_to_array(faiss.downcast_index(self.index.index).sq.trained)
+        vmin, vdiff = trained[:dim], trained[dim:]
+        excess = np.maximum(vmin - embeddings, embeddings - (vmin + vdiff)).max(axis=0)
+        return bool((excess > INT8_RETRAIN_TOLERANCE * vdiff).any())
+
+    def _retrain(self):
+        """
+        Re-fit the int8 quantizer on all live vectors (read back from disk in batches)
+        and rebuild the index from them, dropping tombstoned vectors on the way.
+        """
+        self._vectors.remove(self._tombstones)
+        self._tombstones = set()
+        ids = self._vectors.ids()
+        if not len(ids):
+            return
+        batches = [ids[start:start + 4096] for start in range(0, len(ids), 4096)]
+        low = high = None
+        for batch in batches:
+            vectors = self._vectors.get(batch)
+            low = vectors.min(axis=0) if low is None else np.minimum(low, vectors.min(axis=0))
+            high = vectors.max(axis=0) if high is None else np.maximum(high, vectors.max(axis=0))
+        self._create_index(np.stack([low, high]))
+        for batch in batches:
+            self.index.add_with_ids(self._vectors.get(batch), batch)
+
+    def _add_chunks(self, url, chunks, embeddings):
+        """Assign fresh chunk ids to chunks of one document and add their vectors."""
+        ids = np.arange(self._next_id, self._next_id + len(chunks), dtype="int64")
+        self._next_id += len(chunks)
+        for chunk_id, chunk in zip(ids, chunks):
+            chunk["chunk_id"] = int(chunk_id)
+            self.chunk_metadata[int(chunk_id)] = chunk
+        self._add_vectors(embeddings, ids)
+        self._doc_chunks.setdefault(url, []).extend(int(i) for i in ids)
+
+    def _prune_passage_cache(self):
+        if self.cache_passages:
+            # Only keep embeddings for the chunks currently indexed
+            current = {c['chunk_text'] for c in self.chunk_metadata.values()}
+            self._passage_cache = {t: e for t, e in self._passage_cache.items() if t in current}
+
+    def build_index(self, chunks):
+        """Rebuild the whole index. Chunks are grouped into documents by their "source_url"."""
+        self.index = None
+        self._vectors = None
+        self.chunk_metadata = {}
+        self._doc_chunks = {}
+        self._tombstones = set()
+        self._next_id = 0
+
+        chunks = [dict(c) for c in chunks]
+        embeddings = self._embed_passages([c['chunk_text'] for c in chunks], fit=True)
+        # Created (and, for int8, trained) on every chunk, not on the first document
+        self._create_index(embeddings)
+        by_url = {}
+        for row, chunk in enumerate(chunks):
+            by_url.setdefault(chunk.get("source_url", ""), []).append(row)
+        for url, rows in by_url.items():
+            self._add_chunks(url, [chunks[r] for r in rows], embeddings[rows])
+
+        self._prune_passage_cache()
+        print(f"Index built with {self.index.ntotal} vectors ({self.precision}).")
+
+    def upsert_document(self, url, chunks):
+        """
+        Replace the chunks stored for one document, embedding only chunks whose text changed.
+
+        Unchanged chunks keep their chunk id, removed ones are tombstoned until the
+        next compaction. Returns counts of added, removed and unchanged chunks.
+        """
+        return self.upsert_documents({url: chunks})[url]
+
+    def upsert_documents(self, documents):
+        """
+        upsert_document for many documents ({url: chunks}) with a single encoder call
+        for all their new chunks. Returns per-URL counts.
+        """
+        stats, pending = {}, []
+        for url, chunks in documents.items():
+            old_ids_by_text = {}
+            for chunk_id in self._doc_chunks.get(url, []):
+                old_ids_by_text.setdefault(self.chunk_metadata[chunk_id]["chunk_text"], []).append(chunk_id)
+
+            kept_ids, new_chunks = [], []
+            for chunk in chunks:
+                chunk = {**chunk, "source_url": url}
+                reusable = old_ids_by_text.get(chunk["chunk_text"])
+                if reusable:
+                    chunk["chunk_id"] = reusable.pop(0)
+                    self.chunk_metadata[chunk["chunk_id"]] = chunk
+                    kept_ids.append(chunk["chunk_id"])
+                else:
+                    new_chunks.append(chunk)
+
+            removed = [i for ids in old_ids_by_text.values() for i in ids]
+            self._tombstone(removed)
+            self._doc_chunks[url] = list(kept_ids)
+            pending.append((url, new_chunks))
+            stats[url] = {"added": len(new_chunks), "removed": len(removed), "unchanged": len(kept_ids)}
+
+        texts = [c['chunk_text'] for _, new_chunks in pending for c in new_chunks]
+        if texts:
+            embeddings = self._embed_passages(texts, fit=self.index is None)
+            retrain = False
+            if self.index is None:
+                # Train on the whole batch, not on the first document's chunks
+                self._create_index(embeddings)
+            else:
+                retrain = self._int8_clips(embeddings)
+            offset = 0
+            for url, new_chunks in pending:
+                if new_chunks:
+                    self._add_chunks(url, new_chunks, embeddings[offset:offset + len(new_chunks)])
+                    offset += len(new_chunks)
+            if retrain:
+                self._retrain()
+
+        self._prune_passage_cache()
+        self._maybe_compact()
+        return stats
+
+    def delete_document(self, url):
+        """Remove all chunks of a document. Returns the number of chunks removed."""
+        ids = self._doc_chunks.pop(url, [])
+        self._tombstone(ids)
+        self._maybe_compact()
+        return len(ids)
+
+    def documents(self):
+        """URLs of all indexed documents."""
+        return list(self._doc_chunks)
+
+    def document_chunk_ids(self, urls):
+        """Chunk ids of the given documents, for restricting a search with chunk_ids."""
+        return [i for url in urls for i in self._doc_chunks.get(url, [])]
+
+    def _tombstone(self, ids):
+        for chunk_id in ids:
+            self.chunk_metadata.pop(chunk_id, None)
+            self._tombstones.add(chunk_id)
+
+    def _maybe_compact(self):
+        if self.index is not None and len(self._tombstones) > self.compaction_ratio * self.index.ntotal:
+            self.compact()
+
+    def compact(self):
+        """Physically remove tombstoned vectors from the index. Returns how many were removed."""
+        if not self._tombstones:
+            return 0
+        if self.precision == "int8" and self._vectors is not None:
+            # Rebuilding also re-fits the quantizer to the vectors that remain
+            removed = len(self._tombstones)
+            self._retrain()
+            return removed
+        ids = np.array(sorted(self._tombstones), dtype="int64")
+        self.index.remove_ids(ids)
+        if self._vectors is not None:
+            self._vectors.remove(ids)
+        self._tombstones = set()
+        return len(ids)
+
+    def _search(self, query_embeddings, top_k, chunk_ids=None):
+        """
+        Return (scores, chunk_ids) arrays of shape (n_queries, top_k), skipping tombstones.
+
+        When chunk_ids is given, only those chunks are scored (FAISS ID selector).
+        """
+        scores = np.full((len(query_embeddings), top_k), -np.inf, dtype="float32")
+        ids = np.full((len(query_embeddings), top_k), -1, dtype="int64")
+        params = None
+        if chunk_ids is not None:
+            chunk_ids = np.asarray(chunk_ids, dtype="int64")
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(chunk_ids))
+            fetch_k = min(len(chunk_ids), top_k + len(self._tombstones))
+        else:
+            fetch_k = min(self.index.ntotal, top_k + len(self._tombstones))
+        if fetch_k == 0:
+            return scores, ids
+
+        if self.precision == "binary":
+            raw_scores, raw_ids = self._binary_search(query_embeddings, fetch_k, params)
+        else:
+            raw_scores, raw_ids = self.index.search(query_embeddings, fetch_k, params=params)
+
+        for row in range(len(query_embeddings)):
+            keep = [j for j, i in enumerate(raw_ids[row]) if i != -1 and i not in self._tombstones][:top_k]
+            scores[row, :len(keep)] = raw_scores[row, keep]
+            ids[row, :len(keep)] = raw_ids[row, keep]
+        return scores, ids
+
+    def _binary_search(self, query_embeddings, top_k, params=None):
+        n_candidates = min(self.index.ntotal, top_k * self.rescore_factor)
+        _, candidates = self.index.search(np.packbits(query_embeddings > 0, axis=1), n_candidates, params=params)
+
+        scores = np.full((len(query_embeddings), top_k), -np.inf, dtype="float32")
+        ids = np.full((len(query_embeddings), top_k), -1, dtype="int64")
+        # Read every distinct candidate vector from disk in one gather
+        unique = np.unique(candidates[candidates != -1])
+        vectors = self._vectors.get(unique)
+        for row, cand in enumerate(candidates):
+            cand = cand[cand != -1]
+            if not len(cand):
+                continue
+            # Re-score the hamming candidates with their float16 vectors
+            cand_scores = vectors[np.searchsorted(unique, cand)] @ query_embeddings[row]
+            order = np.argsort(-cand_scores)[:top_k]
+            scores[row, :len(order)] = cand_scores[order]
+            ids[row, :len(order)] = cand[order]
+        return scores, ids
+
+    def memory_bytes(self):
+        """Approximate resident bytes used by the stored vectors (disk copies not included)."""
+        if self.index is None:
+            return 0
+        return self.index.ntotal * self._code_size
+
+    def disk_bytes(self):
+        """Bytes of float16 vector copies kept in a memory-mapped file instead of memory."""
+        return len(self._vectors) * self._vectors.dim * 2 if self._vectors is not None else 0
+
+    def save(self, path):
+        """Persist the index, projection and chunk metadata to a directory."""
         if self.index is None:
             raise ValueError("Index has not been built. Call build_index() first.")
-        question_embedding = self.model.encode([f"query: {question}"], normalize_embeddings=True)
-        distances , indices = self.index.search(np.array(question_embedding, dtype='float32'), top_k)
-        results = []
-        for idx in indices[0]:
-            if idx != -1: # Ensure valid index
-                results.append(self.chunk_metadata[idx])
-        return results
\ No newline at end of file
+        os.makedirs(path, exist_ok=True)
+        # Every file goes through a temporary path; metadata.json is replaced last
+        write_index = faiss.write_index_binary if self.precision == "binary" else faiss.write_index
+        write_atomically(os.path.join(path, "index.faiss"), lambda tmp: write_index(self.index, tmp))
+        if self._projection is not None:
+            write_atomically(
+                os.path.join(path, "projection.faiss"),
+                lambda tmp: faiss.write_VectorTransform(self._projection, tmp)
+            )
+
+        state = {
+            "config": {
+                "model_name": self.model_name,
+                "precision": self.precision,
+                "rescore_factor": self.rescore_factor,
+                "output_dim": self.output_dim,
+                "reduction": self.reduction,
+                "query_prefix": self.query_prefix,
+                "passage_prefix": self.passage_prefix,
+            },
+            "chunks": list(self.chunk_metadata.values()),
+            "documents": self._doc_chunks,
+            "tombstones": sorted(self._tombstones),
+            "next_id": self._next_id,
+        }
+        if self._vectors is not None:
+            state["vector_dim"] = self._vectors.dim
+            state["vector_ids"] = self._vectors.save(os.path.join(path, "vectors.f16"))
+        write_atomically(os.path.join(path, "metadata.json"), _write_json(state))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load an index saved with save(). Extra kwargs go to the constructor."""
+        with open(os.path.join(path, "metadata.json"), encoding="utf-8") as f:
+            state = json.load(f)
+
+        store = cls(**{**state["config"], **kwargs})
+        if store.precision == "binary":
+            store.index = faiss.read_index_binary(os.path.join(path, "index.faiss"))
+            store._code_size = store.index.index.code_size
+        else:
+            store.index = faiss.read_index(os.path.join(path, "index.faiss"))
+            store._code_size = faiss.downcast_index(store.index.index).code_size
+        projection_path = os.path.join(path, "projection.faiss")
+        if os.path.exists(projection_path):
+            store._projection = faiss.read_VectorTransform(projection_path)
+        if "vector_ids" in state:
+            store._vectors = _DiskVectors.load(
+                os.path.join(path, "vectors.f16"), state["vector_dim"], state["vector_ids"]
+            )
+
+        store.chunk_metadata = {c["chunk_id"]: c for c in state["chunks"]}
+        store._doc_chunks = state["documents"]
+        store._tombstones = set(state["tombstones"])
+        store._next_id = state["next_id"]
+        return store
+
+    def query_batch(self, questions, top_k=3, min_score=None, max_score_drop=None, chunk_ids=None):
+        """
+        Retrieve chunks for many questions with one encoder pass and one index search.
+
+        Returns one list per question of chunk dicts, each with an added "score".
+        Hits scoring below min_score, or more than max_score_drop below the best
+        hit for that question, are dropped, so fewer than top_k may come back.
+        chunk_ids restricts the search to those chunks (see document_chunk_ids).
+        """
+        if self.index is None:
+            raise ValueError("Index has not been built. Call build_index() first.")
+        if not questions:
+            return []
+        min_score = self.min_score if min_score is None else min_score
+        max_score_drop = self.max_score_drop if max_score_drop is None else max_score_drop
+
+        question_embeddings = self._embed_queries(questions)
+        distances, indices = self._search(question_embeddings, top_k, chunk_ids)
+        batch_results = []
+        for row_scores, row_indices in zip(distances, indices):
+            results = []
+            for score, idx in zip(row_scores, row_indices):
+                if idx == -1: # Ensure valid index
+                    continue
+                if min_score is not None and score < min_score:
+                    break
+                if max_score_drop is not None and results and score < results[0]["score"] - max_score_drop:
+                    break
+                results.append({**self.chunk_metadata[int(idx)], "score": float(score)})
+            batch_results.append(results)
+        return batch_results
+
+    def query(self, question, top_k=3, min_score=None, max_score_drop=None, chunk_ids=None):
+        return self.query_batch([question], top_k, min_score, max_score_drop, chunk_ids)[0]
@@ -0,0 +1,91 @@
+"""
+Run a file of questions through VectorStoreManager.query_batch.
+
+Questions are read from a .txt file (one per line) or a .jsonl file with
+{"question": ..., "expected": ...} records. When "expected" is given, a question
+counts as a hit if any retrieved chunk contains that text (case-insensitive).
+
+Usage:
+    python evaluate.py --url https://example.com --questions questions.txt
+    python evaluate.py --url https://example.com --questions eval.jsonl --top-k 5 --output results.jsonl
+"""
+import argparse
+import json
+import time
+
+from webscrap import extract_meaningful_text
+from text_processing import TextChunker
+from embedding import DEFAULT_ENCODER, PRECISIONS, VectorStoreManager
+
+
+def load_questions(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                records.append(json.loads(line))
+            else:
+                records.append({"question": line})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--questions", required=True)
+    parser.add_argument("--output", help="Write per-question results as JSONL")
+    parser.add_argument("--model", default=DEFAULT_ENCODER)
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--min-score", type=float, default=None)
+    parser.add_argument("--max-score-drop", type=float, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    result = extract_meaningful_text(args.url)
+    if result["status"] != "success":
+        parser.exit(1, f"Failed to fetch {args.url}: {result['message']}\n")
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, unit="words")
+    store = VectorStoreManager(
+        model_name=args.model,
+        precision=args.precision,
+        min_score=args.min_score,
+        max_score_drop=args.max_score_drop
+    )
+    store.build_index(chunker.process(result["content"]))
+
+    records = load_questions(args.questions)
+    start = time.perf_counter()
+    for i in range(0, len(records), args.batch_size):
+        batch = records[i:i + args.batch_size]
+        for record, docs in zip(batch, store.query_batch([r["question"] for r in batch], args.top_k)):
+            record["results"] = docs
+    elapsed = time.perf_counter() - start
+
+    labelled = [r for r in records if r.get("expected")]
+    hits = sum(
+        any(r["expected"].lower() in doc["chunk_text"].lower() for doc in r["results"])
+        for r in labelled
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print(f"Questions: {len(records)}")
+    print(f"Retrieval time: {elapsed:.2f}s ({elapsed * 1000 / max(len(records), 1):.1f} ms/question)")
+    print(f"Avg chunks returned: {sum(len(r['results']) for r in records) / max(len(records), 1):.2f}")
+    print(f"Query cache: {store.cache_stats()}")
+    if labelled:
+        print(f"Hit rate@{args.top_k}: {hits / len(labelled):.3f} ({hits}/{len(labelled)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import re
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Sentence boundary: end punctuation followed by whitespace, or a blank line
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[tuple]:
+    """Return (sentence, start, end) tuples with character offsets into text."""
+    sentences = []
+    start = 0
+    for match in SENTENCE_SPLIT.finditer(text):
+        sentences.append((start, match.start()))
+        start = match.end()
+    sentences.append((start, len(text)))
+    return [
+        (text[s:e].strip(), s, e) for s, e in sentences
+        if len(text[s:e].strip()) >= min_chars
+    ]
+
+
+class CachedEmbedder:
+    """Wrap a texts -> normalized vectors function with an LRU cache keyed by text."""
+
+    def __init__(self, embed_fn: Callable, maxsize: int = 4096):
+        self.embed_fn = embed_fn
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        missing = list(OrderedDict.fromkeys(t for t in texts if t not in self._cache))
+        if missing:
+            self._cache.update(zip(missing, self.embed_fn(missing)))
+        vectors = []
+        for text in texts:
+            self._cache.move_to_end(text)
+            vectors.append(self._cache[text])
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return np.stack(vectors)
+
+
+def extract_spans(
+    question_embedding: np.ndarray,
+    chunks: List[Dict],
+    embed_sentences: Callable,
+    max_spans: int = 3
+) -> List[Dict]:
+    """
+    Score every sentence of the retrieved chunks against the question embedding.
+
+    All sentences are embedded in one batch and scored with one matrix product.
+    Returns the best spans, highest score first, each with its chunk's source
+    fields, character offsets into the chunk and a markdown highlight.
+    """
+    candidates = []
+    for chunk in chunks:
+        for sentence, start, end in split_sentences(chunk["chunk_text"]):
+            candidates.append((chunk, sentence, start, end))
+    if not candidates:
+        return []
+
+    sentence_embeddings = embed_sentences([c[1] for c in candidates])
+    scores = sentence_embeddings @ np.asarray(question_embedding, dtype="float32").ravel()
+
+    spans = []
+    for i in np.argsort(-scores)[:max_spans]:
+        chunk, sentence, start, end = candidates[i]
+        text = chunk["chunk_text"]
+        spans.append({
+            "text": sentence,
+            "score": float(scores[i]),
+            "source_url": chunk.get("source_url"),
+            "title": chunk.get("title"),
+            "chunk_id": chunk.get("chunk_id"),
+            "start": start,
+            "end": end,
+            "highlighted": f"{text[:start]}**{text[start:end].strip()}**{text[end:]}",
+        })
+    return spans
+
+
+def format_answer(spans: List[Dict]) -> str:
+    """Markdown answer listing the extracted spans and their sources."""
+    lines = []
+    for span in spans:
+        source = f" — [{span['title'] or span['source_url']}]({span['source_url']})" if span.get("source_url") else ""
+        lines.append(f"> {span['text']}{source}")
+    return "\n\n".join(lines)
+
+
+# One sentence cache per vector store, dropped together with the store
+_store_embedders = weakref.WeakKeyDictionary()
+
+
+def _embedder_for(store):
+    embedder = _store_embedders.get(store)
+    if embedder is None:
+        # Only a weak reference: a bound store.embed_passages would keep the key alive forever
+        store_ref = weakref.ref(store)
+        embedder = _store_embedders[store] = CachedEmbedder(lambda texts: store_ref().embed_passages(texts))
+    return embedder
+
+
+def extractive_answer(question, retriever, top_k=3, max_spans=3, filters=None) -> Dict:
+    """
+    Answer from the retrieved chunks without an LLM call.
+
+    Works with a VectorStoreManager or a KnowledgeBase; sentences are embedded with
+    the encoder of the store (or site shard) each chunk came from.
+    Returns {"answer", "spans", "score", "docs", "elapsed_ms"}; "docs" are the retrieved
+    chunks, so a caller falling back to an LLM does not need to search again.
+    """
+    start = time.perf_counter()
+    docs = retriever.query(question, top_k=top_k, **(filters or {}))
+
+    shards = getattr(retriever, "shards", None)
+    by_store = OrderedDict()
+    for doc in docs:
+        store = shards.get(doc.get("site")) if shards else retriever
+        by_store.setdefault(store, []).append(doc)
+
+    spans = []
+    for store, store_docs in by_store.items():
+        question_embedding = store.embed_queries([question])[0]
+        spans.extend(extract_spans(question_embedding, store_docs, _embedder_for(store), max_spans))
+    spans = sorted(spans, key=lambda s: -s["score"])[:max_spans]
+
+    return {
+        "answer": format_answer(spans),
+        "spans": spans,
+        "score": spans[0]["score"] if spans else 0.0,
+        "docs": docs,
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+    }
@@ -0,0 +1,282 @@
+"""
+Build a knowledge base offline from local HTML files, directory trees and WARC archives.
+
+Inputs are streamed: HTML files are read one by one and WARC / WARC.gz archives
+record by record, so memory stays flat regardless of crawl size. Extraction runs
+in a process pool, pages are deduplicated, chunked and embedded in batches, and
+the result is saved as a KnowledgeBase (an existing one in --output is updated).
+Dedup state is saved with it (dedup.json), so later runs are checked against every
+page already indexed, not only against the pages of the same run.
+
+Usage:
+    python ingest.py sample.html --output indexes/kb
+    python ingest.py site_mirror/ --base-url https://example.com/ --output indexes/kb
+    python ingest.py crawl-*.warc.gz --output indexes/kb --workers 8 --batch-size 512
+"""
+import argparse
+import gzip
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urljoin
+
+from webscrap import extract_from_html
+from text_processing import TextChunker
+from dedup import ContentDeduplicator
+from embedding import DEFAULT_ENCODER, PRECISIONS, get_encoder_spec
+from knowledge_base import KnowledgeBase
+
+HTML_SUFFIXES = (".html", ".htm", ".xhtml")
+WARC_SUFFIXES = (".warc", ".warc.gz")
+
+
+# -------------------------------
+# 1. WARC READING
+# -------------------------------
+def iter_warc_records(path):
+    """Yield (headers, payload) for every record of a WARC or WARC.gz file."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ValueError(f"{path}: expected a WARC record header, got {line[:40]!r}")
+
+            headers = {}
+            while True:
+                line = f.readline()
+                if not line or not line.strip():
+                    break
+                name, _, value = line.decode("utf-8", "replace").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            yield headers, f.read(int(headers.get("content-length", 0)))
+
+
+def _dechunk(body):
+    out, pos = bytearray(), 0
+    while True:
+        end = body.find(b"\r\n", pos)
+        if end == -1:
+            break
+        size = int(body[pos:end].split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        out += body[end + 2:end + 2 + size]
+        pos = end + 2 + size + 2
+    return bytes(out)
+
+
+def parse_http_response(payload):
+    """Split a raw HTTP response into (status, headers, body), undoing chunking and compression."""
+    head, sep, body = payload.partition(b"\r\n\r\n")
+    if not sep:
+        head, _, body = payload.partition(b"\n\n")
+    lines = head.decode("iso-8859-1").splitlines()
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        return 0, {}, b""
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encoding = headers.get("content-encoding", "").lower()
+    try:
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+    except (OSError, zlib.error):
+        return status, headers, b""
+    return status, headers, body
+
+
+def iter_warc_pages(path):
+    for headers, payload in iter_warc_records(path):
+        record_type = headers.get("warc-type")
+        url = headers.get("warc-target-uri", "").strip("<>")
+        if record_type == "response" and "application/http" in headers.get("content-type", ""):
+            status, http_headers, body = parse_http_response(payload)
+            if status != 200 or "text/html" not in http_headers.get("content-type", "text/html").lower():
+                continue
+            content_type = http_headers.get("content-type", "")
+        elif record_type == "resource" and "text/html" in headers.get("content-type", ""):
+            body, content_type = payload, headers.get("content-type", "")
+        else:
+            continue
+        if body:
+            yield {"url": url, "html": body, "content_type": content_type, "fetched_at": headers.get("warc-date")}
+
+
+# -------------------------------
+# 2. LOCAL FILES
+# -------------------------------
+def iter_sources(paths, base_url=None):
+    """Yield raw pages ({"url", "html", "fetched_at"}) from files, directories and WARC archives."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield from iter_sources([os.path.join(root, name)], base_url and _join_dir(base_url, path, root))
+        elif path.endswith(WARC_SUFFIXES):
+            yield from iter_warc_pages(path)
+        elif path.lower().endswith(HTML_SUFFIXES):
+            with open(path, "rb") as f:
+                html = f.read()
+            name = os.path.basename(path)
+            url = urljoin(base_url, name) if base_url else Path(path).resolve().as_uri()
+            mtime = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat()
+            yield {"url": url, "html": html, "content_type": "", "fetched_at": mtime}
+
+
+def _join_dir(base_url, top, root):
+    relative = os.path.relpath(root, top).replace(os.sep, "/")
+    return base_url if relative == "." else urljoin(base_url, relative.rstrip("/") + "/")
+
+
+# -------------------------------
+# 3. PIPELINE
+# -------------------------------
+def extract_page(source):
+    """Worker: run the regular extraction on one raw page."""
+    try:
+        result = extract_from_html(source["html"], source.get("content_type", ""))
+    except Exception as e:
+        return {"url": source["url"], "status": "error", "message": str(e)}
+    return {**result, "url": source["url"], "fetched_at": source["fetched_at"]}
+
+
+def bounded_map(executor, fn, iterable, window):
+    """Ordered executor.map that keeps at most `window` tasks in flight."""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="HTML files, directories or .warc/.warc.gz archives")
+    parser.add_argument("--output", required=True, help="Knowledge base directory (created or updated)")
+    parser.add_argument("--base-url", help="URL prefix for local files instead of file:// URLs")
+    parser.add_argument("--model", help=f"Encoder for a new knowledge base (default: {DEFAULT_ENCODER})")
+    parser.add_argument("--precision", choices=PRECISIONS, help="Index precision for a new knowledge base (default: float32)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    parser.add_argument("--batch-size", type=int, default=256, help="Pages embedded per batch")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep near duplicates and boilerplate (drops saved dedup state)")
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.output, "knowledge_base.json")):
+        kb = KnowledgeBase.load(args.output)
+        # An existing knowledge base keeps its encoder and precision; refuse conflicting flags
+        saved_precision = kb.store_kwargs.get("precision") or next(
+            (shard.precision for shard in kb.shards.values()), "float32"
+        )
+        if args.model and get_encoder_spec(args.model)["model_name"] != get_encoder_spec(kb.model_name)["model_name"]:
+            parser.error(f"{args.output} was built with --model {kb.model_name}, not {args.model}.")
+        if args.precision and args.precision != saved_precision:
+            parser.error(f"{args.output} was built with --precision {saved_precision}, not {args.precision}.")
+    else:
+        kb = KnowledgeBase(model_name=args.model or DEFAULT_ENCODER, precision=args.precision or "float32")
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, unit="words")
+    deduper = None
+    dedup_path = os.path.join(args.output, "dedup.json")
+    if args.no_dedup:
+        pass
+    elif os.path.exists(dedup_path):
+        deduper = ContentDeduplicator.load(dedup_path)
+        # Forget pages that left the knowledge base since the last save
+        for url in deduper.pages():
+            if url not in kb.pages:
+                deduper.remove_page(url)
+    else:
+        if kb.pages:
+            print(
+                f"Warning: {args.output} has no saved dedup state, so new pages are only compared "
+                "with each other, not with the pages already indexed."
+            )
+        deduper = ContentDeduplicator()
+
+    counts = {"pages": 0, "failed": 0, "duplicates": 0, "indexed": 0, "chunks": 0}
+    start = time.time()
+    sources = iter_sources(args.paths, args.base_url)
+
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        extracted = bounded_map(executor, extract_page, sources, args.workers * 4) if executor else map(extract_page, sources)
+        for batch in batched(extracted, args.batch_size):
+            counts["pages"] += len(batch)
+            pages = [p for p in batch if p["status"] == "success"]
+            counts["failed"] += len(batch) - len(pages)
+
+            if deduper is not None:
+                kept = deduper.dedupe(pages)
+                counts["duplicates"] += len(pages) - len(kept)
+                kept_urls = {p["url"] for p in kept}
+                for page in pages:
+                    if page["url"] not in kept_urls:
+                        # A re-ingested page that is now a near duplicate leaves the knowledge base
+                        kb.delete_page(page["url"])
+                        deduper.remove_page(page["url"])
+                pages = kept
+
+            to_index = []
+            for page in pages:
+                chunks = chunker.process(page["content"])
+                if chunks:
+                    to_index.append({**page, "chunks": chunks})
+                    counts["chunks"] += len(chunks)
+            kb.add_pages(to_index)
+            counts["indexed"] += len(to_index)
+
+            elapsed = time.time() - start
+            print(f"{counts['pages']} pages ({counts['pages'] / elapsed:.1f}/s), {counts['chunks']} chunks indexed")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    kb.save(args.output)
+    if deduper is not None:
+        deduper.save(dedup_path)
+    elif os.path.exists(dedup_path):
+        # The saved fingerprints no longer match the indexed pages
+        os.remove(dedup_path)
+    elapsed = time.time() - start
+    print(
+        f"\nDone in {elapsed:.1f}s: {counts['indexed']} pages indexed, {counts['duplicates']} duplicates, "
+        f"{counts['failed']} failed, {counts['chunks']} chunks -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
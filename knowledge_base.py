@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from urllib.parse import urlparse
+
+from embedding import DEFAULT_ENCODER, VectorStoreManager, write_atomically
+
+
+def site_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def _as_iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Expected an ISO string, date or datetime, got {type(value).__name__}")
+
+
+class _ReadWriteLock:
+    """Many concurrent readers or a single writer. A waiting writer holds back new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class KnowledgeBase:
+    """
+    Long-lived index over many sites, sharded per site.
+
+    Every site gets its own VectorStoreManager shard (sharing the encoder and the
+    query embedding cache), and every chunk carries its source URL, title and
+    fetch date. Queries are routed only to the shards of the requested sites and,
+    inside a shard, restricted to the chunks of the pages matching the filters, so
+    filtered searches never score unrelated chunks. Shards are searched in parallel
+    on a thread pool (FAISS releases the GIL while searching).
+
+    One knowledge base can be shared between threads (Streamlit sessions): searches
+    run concurrently, while writes wait for them and run alone, because FAISS indexes
+    must not be modified during a search.
+    """
+
+    def __init__(self, model_name=DEFAULT_ENCODER, workers=4, **store_kwargs):
+        self.model_name = model_name
+        self.store_kwargs = store_kwargs
+        self.workers = workers
+        self.shards = {}
+        # url -> {"title", "site", "fetched_at"}
+        self.pages = {}
+        self._query_cache = OrderedDict()
+        # Searches take the read side, add/delete take the write side
+        self._lock = _ReadWriteLock()
+        # Saves read like searches, but two of them must not write the same files at once
+        self._save_lock = threading.Lock()
+
+    def _shard(self, site, create=False):
+        if site not in self.shards and create:
+            self.shards[site] = VectorStoreManager(
+                model_name=self.model_name, query_cache=self._query_cache, **self.store_kwargs
+            )
+        return self.shards.get(site)
+
+    # -------------------------------
+    # 1. WRITES
+    # -------------------------------
+    def add_page(self, url, title, chunks, fetched_at=None):
+        """Insert or refresh one page. Returns the shard's upsert counts."""
+        return self.add_pages([{"url": url, "title": title, "chunks": chunks, "fetched_at": fetched_at}])[url]
+
+    def add_pages(self, pages):
+        """
+        Insert or refresh many pages ({"url", "title", "chunks", optional "fetched_at"} dicts),
+        embedding the new chunks of each site in one batch. Returns per-URL upsert counts.
+        """
+        by_site = {}
+        for page in pages:
+            fetched_at = _as_iso(page.get("fetched_at")) or datetime.now(timezone.utc).isoformat()
+            by_site.setdefault(site_of(page["url"]), []).append((page, fetched_at))
+
+        stats = {}
+        with self._lock.write():
+            for site, site_pages in by_site.items():
+                documents = {
+                    page["url"]: [
+                        {**c, "title": page["title"], "site": site, "fetched_at": fetched_at}
+                        for c in page["chunks"]
+                    ]
+                    for page, fetched_at in site_pages
+                }
+                # Register pages first: every document a shard knows must have its page entry
+                for page, fetched_at in site_pages:
+                    self.pages[page["url"]] = {"title": page["title"], "site": site, "fetched_at": fetched_at}
+                stats.update(self._shard(site, create=True).upsert_documents(documents))
+        return stats
+
+    def delete_page(self, url):
+        with self._lock.write():
+            page = self.pages.get(url)
+            if page is None:
+                return 0
+            removed = self.shards[page["site"]].delete_document(url)
+            del self.pages[url]
+            return removed
+
+    # -------------------------------
+    # 2. FILTERED SEARCH
+    # -------------------------------
+    def sites(self):
+        with self._lock.read():
+            return sorted(self.shards)
+
+    def _matching_pages(self, site, path_prefix=None, since=None, until=None):
+        since, until = _as_iso(since), _as_iso(until)
+        for url in self.shards[site].documents():
+            page = self.pages.get(url)
+            if page is None:
+                continue
+            if path_prefix and not urlparse(url).path.startswith(path_prefix):
+                continue
+            if since and page["fetched_at"] < since:
+                continue
+            if until and page["fetched_at"] > until:
+                continue
+            yield url
+
+    def query_batch(
+        self,
+        questions,
+        top_k=3,
+        sites=None,
+        path_prefix=None,
+        since=None,
+        until=None,
+        min_score=None,
+        max_score_drop=None
+    ):
+        """
+        Search the shards of `sites` (all sites by default) and merge hits by score.
+
+        path_prefix, since and until filter pages by URL path and fetch date.
+        """
+        if not questions:
+            return []
+        with self._lock.read():
+            return self._query_batch(questions, top_k, sites, path_prefix, since, until, min_score, max_score_drop)
+
+    def _query_batch(self, questions, top_k, sites, path_prefix, since, until, min_score, max_score_drop):
+        targets = [s for s in (sites or self.shards) if s in self.shards]
+        filtered = path_prefix is not None or since is not None or until is not None
+
+        def search(site):
+            shard = self.shards[site]
+            chunk_ids = None
+            if filtered:
+                chunk_ids = shard.document_chunk_ids(self._matching_pages(site, path_prefix, since, until))
+                if not chunk_ids:
+                    return [[] for _ in questions]
+            return shard.query_batch(questions, top_k, min_score=min_score, chunk_ids=chunk_ids)
+
+        # Encode once up front so the shards all hit the shared query cache
+        if targets:
+            self.shards[targets[0]]._embed_queries(questions)
+        if self.workers > 1 and len(targets) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(targets))) as pool:
+                per_shard = list(pool.map(search, targets))
+        else:
+            per_shard = [search(site) for site in targets]
+
+        merged = []
+        for row in range(len(questions)):
+            hits = sorted((h for shard_hits in per_shard for h in shard_hits[row]), key=lambda h: -h["score"])[:top_k]
+            if max_score_drop is not None and hits:
+                hits = [h for h in hits if h["score"] >= hits[0]["score"] - max_score_drop]
+            merged.append(hits)
+        return merged
+
+    def query(self, question, top_k=3, **filters):
+        return self.query_batch([question], top_k, **filters)[0]
+
+    # -------------------------------
+    # 3. PERSISTENCE
+    # -------------------------------
+    @staticmethod
+    def _shard_dir(site):
+        return re.sub(r'[^A-Za-z0-9._-]', '_', site) or "_"
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        # Saving only reads the shards, so searches can go on meanwhile; files are replaced atomically
+        with self._save_lock, self._lock.read():
+            for site, shard in self.shards.items():
+                if shard.index is not None:
+                    shard.save(os.path.join(path, "shards", self._shard_dir(site)))
+            state = {
+                "model_name": self.model_name,
+                # Shard settings (precision, output_dim, ...) for sites added after a reload
+                "store_config": self.store_kwargs,
+                "sites": {site: self._shard_dir(site) for site in self.shards},
+                "pages": self.pages,
+            }
+
+            def write(tmp_path):
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+
+            write_atomically(os.path.join(path, "knowledge_base.json"), write)
+
+    @classmethod
+    def load(cls, path, workers=4, **store_kwargs):
+        with open(os.path.join(path, "knowledge_base.json"), encoding="utf-8") as f:
+            state = json.load(f)
+        kb = cls(
+            model_name=state["model_name"], workers=workers,
+            **{**state.get("store_config", {}), **store_kwargs}
+        )
+        for site, dirname in state["sites"].items():
+            shard_path = os.path.join(path, "shards", dirname)
+            if os.path.exists(shard_path):
+                kb.shards[site] = VectorStoreManager.load(
+                    shard_path, query_cache=kb._query_cache, **store_kwargs
+                )
+        kb.pages = state["pages"]
+        return kb
@@ -0,0 +1,188 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+
+class RateLimitError(Exception):
+    """Raised by an LLM backend when the provider rejects a call for rate limiting."""
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call does not finish before its deadline."""
+
+
+def response_text(response) -> str:
+    """Extract plain text from a LangChain message (string or structured content) or a str."""
+    if isinstance(response, str):
+        return response
+    content = getattr(response, "content", response)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        # Extract text from structured response
+        answer = ""
+        for item in content:
+            if isinstance(item, dict) and 'text' in item:
+                answer += item['text']
+            elif hasattr(item, 'text'):
+                answer += item.text
+        return answer
+    return str(content)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Best-effort detection of provider rate-limit errors (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    if isinstance(error, RateLimitError):
+        return True
+    text = f"{type(error).__name__} {error}"
+    return any(marker in text for marker in ("429", "RateLimit", "ResourceExhausted", "RESOURCE_EXHAUSTED"))
+
+
+class HttpLLM:
+    """
+    Minimal LLM client for a JSON-over-HTTP backend, used to run against a local stub server.
+
+    POSTs {"prompt": ...} to `url` and expects {"text": ...}. HTTP 429 raises RateLimitError.
+    """
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def invoke(self, prompt: str) -> str:
+        response = self._session.post(self.url, json={"prompt": prompt}, timeout=self.timeout)
+        if response.status_code == 429:
+            raise RateLimitError(f"429 from {self.url}")
+        response.raise_for_status()
+        return response.json()["text"]
+
+    async def ainvoke(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.invoke, prompt)
+
+
+class LLMGateway:
+    """
+    Async front door for LLM calls shared by every session in the process.
+
+    - at most `max_concurrency` calls are in flight at once
+    - rate-limit errors are retried with exponential backoff and jitter
+    - each call must finish within `timeout` seconds (including retries)
+    - identical prompts that are already in flight share one call
+
+    All calls run on the gateway's own event loop thread, so the concurrency cap
+    and coalescing apply across threads and event loops. Async callers use
+    `await generate(prompt)` from any loop. Synchronous callers (Streamlit) use
+    `generate_sync(prompt)`.
+    """
+
+    def __init__(
+        self,
+        llm_factory: Callable,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0,
+        timeout: float = 60.0
+    ):
+        self.llm_factory = llm_factory
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._llm = None
+        self._llm_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def llm(self):
+        # The warm-up thread and the loop thread may both ask for the client first
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self.llm_factory()
+        return self._llm
+
+    # -------------------------------
+    # ASYNC API
+    # -------------------------------
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await self._generate(prompt, timeout)
+        # The semaphore and in-flight futures belong to the gateway loop, never the caller's
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._generate(prompt, timeout), loop))
+
+    async def _generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        future = self._inflight.get(prompt)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._call_with_retries(prompt, timeout or self.timeout))
+        self._inflight[prompt] = future
+        future.add_done_callback(lambda f: self._inflight.pop(prompt) if self._inflight.get(prompt) is f else None)
+        return await asyncio.shield(future)
+
+    async def _call_with_retries(self, prompt: str, timeout: float) -> str:
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats["timeouts"] += 1
+                raise LLMTimeoutError(f"LLM call exceeded {timeout:g}s")
+            try:
+                # The deadline also covers time spent queued behind the concurrency cap
+                response = await asyncio.wait_for(self._guarded_invoke(prompt), remaining)
+                return response_text(response)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise LLMTimeoutError(f"LLM call exceeded {timeout:g}s")
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+
+    async def _guarded_invoke(self, prompt: str):
+        async with self._semaphore:
+            self.stats["calls"] += 1
+            return await self._ainvoke(prompt)
+
+    async def _ainvoke(self, prompt: str):
+        # Building the client can block (imports, auth), keep it off the event loop
+        llm = self._llm or await asyncio.to_thread(lambda: self.llm)
+        if hasattr(llm, "ainvoke"):
+            return await llm.ainvoke(prompt)
+        return await asyncio.to_thread(llm.invoke, prompt)
+
+    # -------------------------------
+    # SYNC API
+    # -------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True).start()
+            return self._loop
+
+    def generate_sync(self, prompt: str, timeout: Optional[float] = None) -> str:
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._generate(prompt, timeout), loop).result()
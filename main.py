@@ -1,8 +1,16 @@
+import os
 import streamlit as st
 from webscrap import extract_meaningful_text
 from text_processing import TextChunker
-from embedding import VectorStoreManager
-from ai_handler import answer_question, memory
+from embedding import VectorStoreManager, warm_up as warm_up_encoder
+from ai_handler import (
+    RETRIEVAL_MAX_SCORE_DROP,
+    RETRIEVAL_MIN_SCORE,
+    answer_question,
+    memory,
+    warm_up as warm_up_llm
+)
+from knowledge_base import KnowledgeBase
 import time
 from datetime import datetime
 
@@ -130,21 +138,50 @@ def initialize_session_state():
     
     if "content_preview" not in st.session_state:
         st.session_state.content_preview = ""
+    
+    if "extracted" not in st.session_state:
+        st.session_state.extracted = None
+    
+    if "chunk_params" not in st.session_state:
+        st.session_state.chunk_params = None
 
 initialize_session_state()
 
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """Load the encoder and Gemini client in the background, once per process, while the UI renders."""
+    return warm_up_encoder(), warm_up_llm()
+
+start_warm_up()
+
+# Optional shared, multi-site knowledge base persisted in this directory
+KNOWLEDGE_BASE_DIR = os.getenv("KNOWLEDGE_BASE_DIR")
+
+
+@st.cache_resource(show_spinner=False)
+def get_knowledge_base():
+    """Load (or create) the knowledge base once per process and share it between sessions."""
+    if not KNOWLEDGE_BASE_DIR:
+        return None
+    if os.path.exists(os.path.join(KNOWLEDGE_BASE_DIR, "knowledge_base.json")):
+        return KnowledgeBase.load(KNOWLEDGE_BASE_DIR)
+    return KnowledgeBase()
+
 # ============================================================================
 # CORE FUNCTIONS
 # ============================================================================
-def index_website(url: str) -> tuple:
+def index_website(url: str, chunk_size: int = 500, chunk_overlap: int = 100) -> tuple:
     """
     Index a website by scraping, chunking, and building vector embeddings.
     
     Args:
         url: The website URL to index
+        chunk_size: Chunk size in words
+        chunk_overlap: Chunk overlap in words
         
     Returns:
-        tuple: (vector_store, title, chunks_count, content_preview)
+        tuple: (vector_store, title, chunks_count, content_preview, elapsed_time)
     """
     start_time = time.time()
     
@@ -155,24 +192,52 @@ def index_website(url: str) -> tuple:
         st.error(f"❌ {result['message']}")
         return None, "", 0, ""
     
-    # Chunk the text
-    chunker = TextChunker(
-        chunk_size=500,
-        chunk_overlap=100,
-        unit="words"
-    )
-    chunks = chunker.process(result["content"])
+    # Keep the extracted text so chunk settings can change without re-fetching
+    st.session_state.extracted = {**result, "url": url}
     
-    # Build vector index
-    vector_store = VectorStoreManager()
-    vector_store.build_index(chunks)
+    vector_store, chunks_count = build_vector_store(result["content"], chunk_size, chunk_overlap)
     
     elapsed_time = time.time() - start_time
     
     # Get content preview (first 500 chars)
     content_preview = result["content"][:500] + "..." if len(result["content"]) > 500 else result["content"]
     
-    return vector_store, result["title"], len(chunks), content_preview, elapsed_time
+    return vector_store, result["title"], chunks_count, content_preview, elapsed_time
+
+
+def build_vector_store(content: str, chunk_size: int, chunk_overlap: int) -> tuple:
+    """
+    Chunk extracted text and (re)build the vector index.
+    
+    The session's existing vector store is reused, so the encoder is not reloaded
+    and embeddings of chunks that did not change are taken from its cache.
+    
+    Args:
+        content: Extracted website text
+        chunk_size: Chunk size in words
+        chunk_overlap: Chunk overlap in words
+        
+    Returns:
+        tuple: (vector_store, chunks_count)
+    """
+    chunker = TextChunker(
+        chunk_size=chunk_size,
+        chunk_overlap=min(chunk_overlap, chunk_size - 1),
+        unit="words"
+    )
+    chunks = chunker.process(content)
+    
+    # Tag chunks with their source so answers can cite it
+    extracted = st.session_state.extracted or {}
+    for chunk in chunks:
+        chunk["source_url"] = extracted.get("url", "")
+        chunk["title"] = extracted.get("title", "")
+    
+    vector_store = st.session_state.index or VectorStoreManager(cache_passages=True)
+    vector_store.build_index(chunks)
+    st.session_state.chunk_params = (chunk_size, chunk_overlap)
+    
+    return vector_store, len(chunks)
 
 
 def typewriter_effect(text: str, speed: float = 0.02):
@@ -199,21 +264,46 @@ def typewriter_effect(text: str, speed: float = 0.02):
     return placeholder
 
 
-def get_chatbot_response(query: str, index, url: str, title: str) -> str:
+def get_chatbot_response(
+    query: str,
+    index,
+    url: str,
+    title: str,
+    top_k: int = 3,
+    filters: dict = None,
+    mode: str = "llm",
+    min_score: float = None,
+    max_score_drop: float = None
+) -> str:
     """
     Get a response from the chatbot using RAG.
     
     Args:
         query: User's question
-        index: Vector store index
+        index: Vector store index or knowledge base
         url: Indexed website URL
         title: Website title
+        top_k: Number of chunks to retrieve
+        filters: Knowledge base filters (sites, path_prefix)
+        mode: Answer mode (llm, extractive or auto)
+        min_score: Drop chunks scoring below this (None keeps them)
+        max_score_drop: Drop chunks scoring this far below the best one (None keeps them)
         
     Returns:
         str: Chatbot response
     """
     try:
-        response = answer_question(query, index, url, title)
+        response = answer_question(
+            query,
+            index,
+            url,
+            title,
+            top_k=top_k,
+            filters=filters,
+            mode=mode,
+            min_score=min_score,
+            max_score_drop=max_score_drop
+        )
         return response
     except Exception as e:
         return f"❌ Error generating response: {str(e)}"
@@ -246,7 +336,11 @@ with st.sidebar:
         if st.button("🚀 Index Website", use_container_width=True):
             if url_input:
                 with st.spinner("🔄 Scraping and indexing..."):
-                    result = index_website(url_input)
+                    result = index_website(
+                        url_input,
+                        st.session_state.get("chunk_size", 500),
+                        st.session_state.get("chunk_overlap", 100)
+                    )
                     
                     if result[0] is not None:
                         st.session_state.index = result[0]
@@ -278,6 +372,9 @@ with st.sidebar:
         if st.session_state.indexing_time:
             st.metric("⏱️ Indexing Time", f"{st.session_state.indexing_time:.2f}s")
         
+        cache_stats = st.session_state.index.cache_stats()
+        st.metric("⚡ Query Cache Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+        
         # Content preview in expander
         with st.expander("👁️ Content Preview"):
             st.text_area(
@@ -291,14 +388,77 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # Shared knowledge base
+    knowledge_base = get_knowledge_base()
+    if knowledge_base is not None:
+        st.markdown("### 📚 Knowledge Base")
+        st.caption(f"{len(knowledge_base.pages)} pages from {len(knowledge_base.sites())} sites")
+        
+        if st.session_state.index is not None and st.button("➕ Add Indexed Website", use_container_width=True):
+            with st.spinner("🔄 Adding to knowledge base..."):
+                chunks = [
+                    {"chunk_index": c["chunk_index"], "chunk_text": c["chunk_text"]}
+                    for c in st.session_state.index.chunk_metadata.values()
+                ]
+                knowledge_base.add_page(st.session_state.indexed_url, st.session_state.title, chunks)
+                knowledge_base.save(KNOWLEDGE_BASE_DIR)
+            st.success("✅ Added to knowledge base")
+        
+        st.toggle("Search knowledge base", key="use_knowledge_base")
+        st.multiselect("Sites", knowledge_base.sites(), key="kb_sites", help="Leave empty to search all sites")
+        st.text_input("Path prefix", key="kb_path_prefix", placeholder="/docs")
+        
+        st.markdown("---")
+    
     # Settings
     with st.expander("⚙️ Advanced Settings"):
         st.markdown("**Chunk Settings**")
-        chunk_size = st.slider("Chunk Size (words)", 100, 1000, 500)
-        chunk_overlap = st.slider("Chunk Overlap (words)", 0, 200, 100)
+        chunk_size = st.slider("Chunk Size (words)", 100, 1000, 500, key="chunk_size")
+        chunk_overlap = st.slider("Chunk Overlap (words)", 0, 200, 100, key="chunk_overlap")
         
         st.markdown("**Retrieval Settings**")
-        top_k = st.slider("Top K Results", 1, 10, 3)
+        top_k = st.slider("Top K Results", 1, 10, 3, key="top_k")
+        st.slider(
+            "Min Score",
+            0.0,
+            1.0,
+            RETRIEVAL_MIN_SCORE,
+            0.01,
+            key="min_score",
+            help="Skip chunks scoring below this (0 = off). Scores depend on the encoder"
+        )
+        st.slider(
+            "Max Score Drop",
+            0.0,
+            0.5,
+            RETRIEVAL_MAX_SCORE_DROP,
+            0.01,
+            key="max_score_drop",
+            help="Skip chunks scoring this far below the best match (0 = off)"
+        )
+        
+        st.markdown("**Answer Mode**")
+        st.radio(
+            "Answer Mode",
+            ["llm", "auto", "extractive"],
+            format_func={"llm": "🤖 LLM", "auto": "⚡ Auto (extractive first)", "extractive": "📝 Extractive only"}.get,
+            key="answer_mode",
+            label_visibility="collapsed",
+            help="Extractive answers quote the best matching sentences without calling the LLM"
+        )
+    
+    # Re-chunk from the cached text when chunk settings change (top_k needs no rebuild)
+    if (
+        st.session_state.index is not None
+        and st.session_state.extracted is not None
+        and st.session_state.chunk_params != (chunk_size, chunk_overlap)
+    ):
+        with st.spinner("🔄 Re-chunking with new settings..."):
+            rebuild_start = time.time()
+            _, st.session_state.total_chunks = build_vector_store(
+                st.session_state.extracted["content"], chunk_size, chunk_overlap
+            )
+            st.session_state.indexing_time = time.time() - rebuild_start
     
     # Footer
     st.markdown("---")
@@ -335,9 +495,11 @@ for message in st.session_state.messages:
         if "timestamp" in message:
             st.caption(f"🕒 {message['timestamp']}")
 
+use_knowledge_base = st.session_state.get("use_knowledge_base") and get_knowledge_base() is not None
+
 # Chat input
 if prompt := st.chat_input("💬 Ask a question about the website..."):
-    if not st.session_state.index:
+    if not st.session_state.index and not use_knowledge_base:
         st.warning("⚠️ Please index a website in the sidebar first.")
     else:
         # Get current timestamp
@@ -358,12 +520,32 @@ if prompt := st.chat_input("💬 Ask a question about the website..."):
         # Generate assistant response
         with st.chat_message("assistant"):
             with st.spinner("🤔 Thinking..."):
-                response = get_chatbot_response(
-                    prompt,
-                    st.session_state.index,
-                    st.session_state.indexed_url,
-                    st.session_state.title
-                )
+                if use_knowledge_base:
+                    response = get_chatbot_response(
+                        prompt,
+                        get_knowledge_base(),
+                        None,
+                        None,
+                        top_k=st.session_state.get("top_k", 3),
+                        filters={
+                            "sites": st.session_state.get("kb_sites") or None,
+                            "path_prefix": st.session_state.get("kb_path_prefix") or None
+                        },
+                        mode=st.session_state.get("answer_mode", "llm"),
+                        min_score=st.session_state.get("min_score") or None,
+                        max_score_drop=st.session_state.get("max_score_drop") or None
+                    )
+                else:
+                    response = get_chatbot_response(
+                        prompt,
+                        st.session_state.index,
+                        st.session_state.indexed_url,
+                        st.session_state.title,
+                        top_k=st.session_state.get("top_k", 3),
+                        mode=st.session_state.get("answer_mode", "llm"),
+                        min_score=st.session_state.get("min_score") or None,
+                        max_score_drop=st.session_state.get("max_score_drop") or None
+                    )
             if not response:
                 response = "Sorry, I don't have enough information to answer that question."
             # Display response with typewriter effect
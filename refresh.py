@@ -0,0 +1,115 @@
+"""
+Refresh a saved index by re-fetching its pages and applying only the changes.
+
+Each known URL (or the URLs given with --url) is fetched again and re-chunked.
+Chunks whose text is unchanged keep their vectors, changed chunks are embedded
+and added, and chunks that disappeared are deleted. Near-duplicate pages are dropped and
+boilerplate blocks repeated across pages of a site are stripped before chunking. The
+fingerprints of every indexed page are saved with the index (dedup.json), so refreshing
+only a few URLs is checked against the whole index, not just against each other.
+The index is created if the directory does not exist yet.
+
+Usage:
+    python refresh.py indexes/docs
+    python refresh.py indexes/docs --url https://example.com/new-page --delete-failed
+"""
+import argparse
+import os
+import time
+
+from webscrap import extract_meaningful_text
+from text_processing import TextChunker
+from embedding import VectorStoreManager
+from dedup import ContentDeduplicator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("index_dir")
+    parser.add_argument("--url", action="append", default=[], help="Refresh (or add) only these URLs")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--delete-failed", action="store_true", help="Delete documents that can no longer be fetched")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep near-duplicate pages and boilerplate blocks (drops saved dedup state)")
+    parser.add_argument("--compact", action="store_true", help="Remove all tombstoned vectors before saving")
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.index_dir, "metadata.json")):
+        store = VectorStoreManager.load(args.index_dir)
+    elif args.url:
+        store = VectorStoreManager()
+    else:
+        parser.error(f"No index at {args.index_dir}. Pass --url to create one.")
+
+    deduper = None
+    dedup_path = os.path.join(args.index_dir, "dedup.json")
+    if args.no_dedup:
+        pass
+    elif os.path.exists(dedup_path):
+        deduper = ContentDeduplicator.load(dedup_path)
+        # Forget pages that left the index since the last save
+        indexed = set(store.documents())
+        for url in deduper.pages():
+            if url not in indexed:
+                deduper.remove_page(url)
+    elif args.url and store.documents():
+        print(
+            f"Warning: {args.index_dir} has no saved dedup state, so --url pages cannot be compared "
+            "against the rest of the index. Skipping dedup; run a full refresh once to enable it."
+        )
+    else:
+        deduper = ContentDeduplicator()
+
+    chunker = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, unit="words")
+    totals = {"added": 0, "removed": 0, "unchanged": 0}
+    start = time.time()
+
+    pages = []
+    for url in args.url or store.documents():
+        result = extract_meaningful_text(url)
+        if result["status"] != "success":
+            if args.delete_failed:
+                removed = store.delete_document(url)
+                totals["removed"] += removed
+                if deduper is not None:
+                    deduper.remove_page(url)
+                print(f"{url}: {result['message']}, deleted {removed} chunks")
+            else:
+                print(f"{url}: {result['message']}, skipped")
+            continue
+        pages.append({"url": url, **result})
+
+    if deduper is not None:
+        kept = deduper.dedupe(pages)
+        kept_urls = {p["url"] for p in kept}
+        for page in pages:
+            if page["url"] not in kept_urls:
+                removed = store.delete_document(page["url"])
+                totals["removed"] += removed
+                deduper.remove_page(page["url"])
+                print(f"{page['url']}: near duplicate, deleted {removed} chunks")
+        pages = kept
+
+    for page in pages:
+        stats = store.upsert_document(page["url"], chunker.process(page["content"]))
+        for key in totals:
+            totals[key] += stats[key]
+        print(f"{page['url']}: +{stats['added']} -{stats['removed']} ={stats['unchanged']}")
+
+    if args.compact:
+        store.compact()
+    store.save(args.index_dir)
+    if deduper is not None:
+        deduper.save(dedup_path)
+    elif args.no_dedup and os.path.exists(dedup_path):
+        # The saved fingerprints no longer match the indexed pages
+        os.remove(dedup_path)
+
+    print(
+        f"\nDone in {time.time() - start:.1f}s: {totals['added']} added, "
+        f"{totals['removed']} removed, {totals['unchanged']} unchanged chunks"
+    )
+
+
+if __name__ == "__main__":
+    main()
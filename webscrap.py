@@ -1,9 +1,112 @@
+import re
+import codecs
 import requests
+import lxml.html
+from lxml import etree
 from bs4 import BeautifulSoup
 from readability.readability import Document
 from collections import OrderedDict
 from urllib.parse import urlparse
 
+# ---------- Encoding Detection ----------
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF32_LE, "utf-32"),  # checked before UTF-16 LE, which shares its first bytes
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+META_SNIFF_BYTES = 4096        # <meta charset> must appear early in the document
+DETECT_PREFIX_BYTES = 64 * 1024  # statistical detection only looks at this much
+# Single-byte guesses for the same language within this much "chaos" (mess) of the
+# detector's best guess are treated as ties
+DETECT_CHAOS_MARGIN = 0.1
+# Tie-break order for Latin-script guesses, most used on the web first. Latin pages decode
+# almost cleanly in many code pages (French cp1252 is often guessed as cp1257), while other
+# scripts garble visibly in the wrong one, so their best guess is kept as is.
+COMMON_LATIN_SINGLE_BYTE = ["cp1252", "iso8859-2", "cp1250", "iso8859-15", "cp1254", "iso8859-9"]
+
+
+def _codec_name(label):
+    """Python codec name for a charset label, following browsers for common mislabels."""
+    try:
+        name = codecs.lookup(label).name
+    except LookupError:
+        return None
+    # Browsers decode "latin-1"/"ascii" pages as windows-1252
+    return "cp1252" if name in ("iso8859-1", "ascii") else name
+
+
+def detect_encoding(raw: bytes, content_type: str = "") -> str:
+    """
+    Pick the encoding of an HTML body without decoding all of it.
+
+    Order: byte order mark, Content-Type charset, <meta charset> in the first few KB,
+    then a UTF-8 check and a statistical detector over a bounded prefix.
+    """
+    for bom, encoding in BOMS:
+        if raw.startswith(bom):
+            return encoding
+
+    match = HEADER_CHARSET_RE.search(content_type or "")
+    if match and _codec_name(match.group(1)):
+        return _codec_name(match.group(1))
+
+    match = META_CHARSET_RE.search(raw[:META_SNIFF_BYTES])
+    if match:
+        encoding = _codec_name(match.group(1).decode("ascii", "ignore"))
+        if encoding:
+            # A page that can declare itself in ASCII is not UTF-16
+            return "utf-8" if encoding.startswith("utf-16") else encoding
+
+    prefix = raw[:DETECT_PREFIX_BYTES]
+    try:
+        prefix.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the prefix boundary is still UTF-8
+        if len(raw) > len(prefix) and e.start >= len(prefix) - 3:
+            return "utf-8"
+
+    try:
+        from charset_normalizer import from_bytes
+        from charset_normalizer.utils import is_multi_byte_encoding
+    except ImportError:
+        return "cp1252"
+
+    # Not UTF-8, so the prefix has non-ASCII bytes for the detector to work with
+    matches = from_bytes(prefix)
+    best = matches.best()
+    if best is None or not _codec_name(best.encoding):
+        return "cp1252"
+    if is_multi_byte_encoding(best.encoding):
+        return _codec_name(best.encoding)
+    ties = {
+        _codec_name(m.encoding) for m in matches
+        if m.language == best.language and m.chaos <= best.chaos + DETECT_CHAOS_MARGIN
+    }
+    return next((name for name in COMMON_LATIN_SINGLE_BYTE if name in ties), _codec_name(best.encoding))
+
+
+def parse_html(html, content_type: str = ""):
+    """Parse HTML (bytes or str) into an lxml tree, handing bytes to lxml with a detected encoding."""
+    if isinstance(html, str):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:  # str with an XML encoding declaration
+            html = html.encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+
+    encoding = detect_encoding(html, content_type)
+    try:
+        return lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding))
+    except (LookupError, ValueError, etree.LxmlError):
+        # Codec unknown to libxml2: decode in Python instead
+        utf8_parser = lxml.html.HTMLParser(encoding="utf-8")
+        return lxml.html.document_fromstring(html.decode(encoding, "replace").encode("utf-8"), parser=utf8_parser)
+
 
 def is_valid_url(url: str) -> bool:
     try:
@@ -69,13 +172,31 @@ def extract_meaningful_text(url: str) -> dict:
             "content": ""
         }
 
+    # Raw bytes: the charset is sniffed from headers/BOM/<meta> instead of response.text
+    return extract_from_html(response.content, response.headers.get("Content-Type", ""))
+
+
+def extract_from_html(html, content_type: str = "") -> dict:
+    """Extract the title and meaningful text from an HTML document (str or bytes)."""
+    # ---------- Parse Once ----------
+    try:
+        tree = parse_html(html, content_type)
+    except (ValueError, etree.LxmlError):
+        return {
+            "status": "error",
+            "message": "Failed to parse HTML content",
+            "title": "",
+            "content": ""
+        }
+
     # ---------- Extract Title ----------
-    soup_full = BeautifulSoup(response.text, "lxml")
-    title = soup_full.title.string.strip() if soup_full.title and soup_full.title.string else "Untitled Page"
+    title_tag = tree.find(".//title")
+    title_text = title_tag.text_content().strip() if title_tag is not None else ""
+    title = title_text or "Untitled Page"
 
     # ---------- Extract Main Content ----------
     try:
-        doc = Document(response.text)
+        doc = Document(tree)
         html = doc.summary(html_partial=True)
         soup = BeautifulSoup(html, "lxml")
     except Exception: